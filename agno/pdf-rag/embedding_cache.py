@@ -0,0 +1,237 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agno.embedder.base import Embedder
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        # Roughly four characters per token for English text.
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+
+def _batch_response(embedder: Embedder) -> Optional[Callable[..., Any]]:
+    """The embedder's raw request method if it takes a list of texts, else None."""
+    try:
+        from agno.embedder.azure_openai import AzureOpenAIEmbedder
+        from agno.embedder.openai import OpenAIEmbedder
+    except ImportError:
+        # The openai package is not installed, so neither can be in use.
+        return None
+    if isinstance(embedder, AzureOpenAIEmbedder):
+        return embedder._response
+    if isinstance(embedder, OpenAIEmbedder):
+        return embedder.response
+    return None
+
+
+@dataclass
+class CachedEmbedder(Embedder):
+    """Wraps an embedder with request batching and an on-disk vector cache.
+
+    Vectors are stored in SQLite keyed on a hash of the model id and the
+    exact chunk text, so boilerplate shared by many invoices is embedded
+    once, ever. Texts that miss the cache are queued, and one caller at a
+    time sends everything queued (from any thread) in a single request of
+    up to `max_batch_inputs` texts and `max_batch_tokens` tokens, waiting
+    `linger` seconds first so concurrent ingests can join the batch.
+
+    OpenAI embedders (and OpenAI-compatible subclasses) and Azure OpenAI
+    embedders get real multi-input requests through their `response` and
+    `_response` methods respectively; any other embedder is called once per
+    text and still benefits from the cache.
+    """
+
+    embedder: Optional[Embedder] = None
+    cache_path: str = ".cache/embeddings.sqlite"
+    max_batch_inputs: int = 2048
+    max_batch_tokens: int = 250_000
+    linger: float = 0.05
+
+    texts: int = field(default=0, init=False)
+    api_calls: int = field(default=0, init=False)
+    cache_hits: int = field(default=0, init=False)
+    batched: int = field(default=0, init=False)
+    tokens_embedded: int = field(default=0, init=False)
+    tokens_saved: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        if self.embedder is None:
+            raise ValueError("CachedEmbedder needs an embedder to wrap")
+        self.dimensions = self.embedder.dimensions
+        self.model = f"{type(self.embedder).__name__}:{getattr(self.embedder, 'id', '')}:{self.dimensions}"
+        self._batch_response = _batch_response(self.embedder)
+
+        Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.cache_path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, tokens INTEGER, vector BLOB NOT NULL)"
+        )
+        self._db_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._pending: Dict[str, str] = {}
+        self._inflight: set = set()
+        self._flushing = False
+        # Embedded by a batch in this run and not yet handed out.
+        self._fresh: set = set()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _load(self, key: str) -> Optional[Tuple[List[float], int]]:
+        with self._db_lock:
+            row = self._db.execute("SELECT vector, tokens FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return array("f", row[0]).tolist(), row[1]
+
+    def _cached_keys(self, keys: List[str]) -> set:
+        found = set()
+        with self._db_lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = self._db.execute(
+                    f"SELECT key FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def _request(self, texts: List[str]) -> Tuple[List[List[float]], int, int]:
+        """Embed texts; returns the vectors, tokens billed and requests made."""
+        if self._batch_response is not None:
+            # OpenAI-family embedders pass `text` straight through as the request input.
+            response = self._batch_response(text=texts)
+            vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            tokens = response.usage.total_tokens if response.usage else sum(map(estimate_tokens, texts))
+            return vectors, tokens, 1
+
+        vectors, tokens = [], 0
+        for text in texts:
+            vector, usage = self.embedder.get_embedding_and_usage(text)
+            vectors.append(vector)
+            tokens += (usage or {}).get("total_tokens") or estimate_tokens(text)
+        return vectors, tokens, len(texts)
+
+    def _embed_batch(self, batch: Dict[str, str]):
+        try:
+            vectors, tokens, calls = self._request(list(batch.values()))
+            rows = [
+                (key, estimate_tokens(text), array("f", vector).tobytes())
+                for (key, text), vector in zip(batch.items(), vectors)
+            ]
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, tokens, vector) VALUES (?, ?, ?)", rows
+                )
+            with self._cond:
+                self._fresh.update(batch)
+                self.api_calls += calls
+                self.tokens_embedded += tokens
+        finally:
+            with self._cond:
+                self._inflight.difference_update(batch)
+
+    def _take_batch(self) -> Dict[str, str]:
+        batch, tokens = {}, 0
+        for key, text in list(self._pending.items()):
+            text_tokens = estimate_tokens(text)
+            if batch and (len(batch) >= self.max_batch_inputs or tokens + text_tokens > self.max_batch_tokens):
+                break
+            batch[key] = text
+            tokens += text_tokens
+            del self._pending[key]
+        self._inflight.update(batch)
+        return batch
+
+    def _fill(self, texts: Dict[str, str]):
+        """Make sure every text is cached, batching with other threads' misses."""
+        with self._cond:
+            for key, text in texts.items():
+                if key not in self._inflight:
+                    self._pending.setdefault(key, text)
+
+        while True:
+            with self._cond:
+                if not any(key in self._pending or key in self._inflight for key in texts):
+                    return
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._flushing = True
+            try:
+                time.sleep(self.linger)
+                with self._cond:
+                    batch = self._take_batch()
+                if batch:
+                    self._embed_batch(batch)
+            finally:
+                with self._cond:
+                    self._flushing = False
+                    self._cond.notify_all()
+
+    def prefetch(self, texts: List[str]):
+        """Embed every uncached text in as few requests as possible."""
+        unique = {self.key(text): text for text in texts}
+        cached = self._cached_keys(list(unique))
+        missing = {key: text for key, text in unique.items() if key not in cached}
+        if missing:
+            self._fill(missing)
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        key = self.key(text)
+        loaded = self._load(key)
+        if loaded is None:
+            self._fill({key: text})
+            loaded = self._load(key)
+        if loaded is None:
+            # The batch holding this text failed in another thread; try it on its own.
+            self._embed_batch({key: text})
+            loaded = self._load(key)
+
+        vector, tokens = loaded
+        with self._cond:
+            self.texts += 1
+            if key in self._fresh:
+                self._fresh.discard(key)
+                self.batched += 1
+            else:
+                self.cache_hits += 1
+                self.tokens_saved += tokens
+        return vector, None
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.get_embedding_and_usage(text)[0]
+
+    def stats(self) -> dict:
+        return {
+            "texts": self.texts,
+            "api_calls": self.api_calls,
+            "calls_saved": max(0, self.texts - self.api_calls),
+            "cache_hits": self.cache_hits,
+            "batched": self.batched,
+            "tokens_embedded": self.tokens_embedded,
+            "tokens_saved": self.tokens_saved,
+        }
+
+    def close(self):
+        with self._db_lock:
+            self._db.close()
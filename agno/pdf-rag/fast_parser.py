@@ -0,0 +1,145 @@
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from pypdf import PdfReader
+
+from models import InvoiceData, InvoiceItem
+
+# Cent-level tolerance for float arithmetic on printed amounts.
+TOLERANCE = 0.011
+
+INVOICE_NUMBER = re.compile(r"\bVANSH-INV-\d{4}-\d{4}\b")
+
+
+def _amount(name: str) -> str:
+    return rf"\$?\s*(?P<{name}>-?[\d,]+(?:\.\d+)?)"
+
+
+# "VANSH_TECH_001 - Vansh Pro Laptop, 16GB RAM, 1 unit @ $999.99, Tax: $80.00, Subtotal: $999.99"
+ITEM_LINE = re.compile(
+    r"^(?P<item>VANSH_[A-Z0-9_]+)\s+-\s+(?P<description>.+?),\s*"
+    r"(?P<quantity>\d+(?:\.\d+)?)\s+units?\s+@\s+" + _amount("unit_price")
+    + r"(?:,\s*Tax:\s*" + _amount("tax") + r")?"
+    + r",\s*Subtotal:\s*" + _amount("subtotal") + r"\s*$"
+)
+# Table rows: "VANSH_TECH_001  Vansh Pro Laptop, 16GB RAM  1  $999.99  $80.00  $999.99"
+ITEM_ROW = re.compile(
+    r"^(?P<item>VANSH_[A-Z0-9_]+)\s+(?P<description>.+?)\s+(?P<quantity>\d+(?:\.\d+)?)\s+"
+    r"\$?(?P<unit_price>[\d,]+\.\d{2})\s+(?:\$?(?P<tax>[\d,]+\.\d{2})\s+)?\$?(?P<subtotal>[\d,]+\.\d{2})\s*$"
+)
+ITEM_START = re.compile(r"^VANSH_[A-Z0-9_]+\b")
+TOTAL_TAX = re.compile(r"^\s*Total\s+Tax\s*:?\s*" + _amount("amount"), re.MULTILINE)
+TOTAL_AMOUNT = re.compile(
+    r"^\s*(?:Grand\s+)?Total(?:\s+Amount)?(?:\s+Due)?\s*:?\s*" + _amount("amount") + r"\s*$", re.MULTILINE
+)
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    return None if value is None else float(value.replace(",", ""))
+
+
+def extract_text(pdf_path: str | Path) -> str:
+    return "\n".join(page.extract_text() or "" for page in PdfReader(pdf_path).pages)
+
+
+def parse_invoice_text(text: str) -> tuple[Optional[InvoiceData], Optional[str]]:
+    """Parse template invoice text; returns (invoice, None) or (None, reason)."""
+    number = INVOICE_NUMBER.search(text)
+    if number is None:
+        return None, "no VANSH-INV-YYYY-NNNN invoice number"
+
+    items = []
+    for line in (line.strip() for line in text.splitlines()):
+        if not ITEM_START.match(line):
+            continue
+        # Every line that starts like an item must parse, or an item would be silently dropped.
+        match = ITEM_LINE.match(line) or ITEM_ROW.match(line)
+        if match is None:
+            return None, f"unrecognised item line: {line!r}"
+        items.append(
+            InvoiceItem(
+                item=match["item"],
+                description=match["description"].strip(),
+                quantity=_number(match["quantity"]),
+                unit_price=_number(match["unit_price"]),
+                tax=_number(match["tax"]),
+                subtotal=_number(match["subtotal"]),
+            )
+        )
+    if not items:
+        return None, "no item lines"
+
+    totals = TOTAL_AMOUNT.findall(text)
+    if not totals:
+        return None, "no total amount"
+    total_tax = TOTAL_TAX.search(text)
+    if total_tax is not None:
+        total_tax = _number(total_tax.group(1))
+    elif any(item.tax is not None for item in items):
+        total_tax = round(sum(item.tax or 0.0 for item in items), 2)
+
+    invoice = InvoiceData(
+        invoice_number=number.group(0),
+        items=items,
+        total_amount=_number(totals[-1]),
+        total_tax=total_tax,
+    )
+    reason = validate(invoice)
+    return (None, reason) if reason else (invoice, None)
+
+
+def validate(invoice: InvoiceData) -> Optional[str]:
+    """Check the arithmetic of a parsed invoice; returns why it fails, or None."""
+    for item in invoice.items:
+        if abs(item.quantity * item.unit_price - item.subtotal) > TOLERANCE:
+            return f"{item.item}: {item.quantity} x {item.unit_price} != subtotal {item.subtotal}"
+
+    subtotal = sum(item.subtotal for item in invoice.items)
+    item_taxes = [item.tax for item in invoice.items if item.tax is not None]
+    if invoice.total_tax is not None and item_taxes and abs(sum(item_taxes) - invoice.total_tax) > TOLERANCE:
+        return f"item taxes {sum(item_taxes):.2f} != total tax {invoice.total_tax:.2f}"
+
+    # Totals are printed either tax-inclusive or as subtotals plus tax.
+    expected = [subtotal]
+    if invoice.total_tax:
+        expected.append(subtotal + invoice.total_tax)
+    if not any(abs(invoice.total_amount - amount) <= TOLERANCE for amount in expected):
+        return f"subtotals {subtotal:.2f} (tax {invoice.total_tax}) != total {invoice.total_amount:.2f}"
+    return None
+
+
+def parse_invoice(pdf_path: str | Path) -> tuple[Optional[InvoiceData], Optional[str]]:
+    """Fast path for template invoices; (None, reason) means use the agent instead."""
+    try:
+        text = extract_text(pdf_path)
+    except Exception as e:
+        return None, f"unreadable PDF: {type(e).__name__}: {e}"
+    return parse_invoice_text(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check which invoices the template parser handles")
+    parser.add_argument("paths", nargs="+", help="PDF files or folders")
+    args = parser.parse_args()
+
+    pdf_paths = []
+    for path in map(Path, args.paths):
+        pdf_paths.extend(sorted(path.glob("*.pdf")) if path.is_dir() else [path])
+
+    hits = 0
+    for pdf_path in pdf_paths:
+        started = time.perf_counter()
+        invoice, reason = parse_invoice(pdf_path)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        hits += invoice is not None
+        status = invoice.invoice_number if invoice else f"fallback: {reason}"
+        print(f"{pdf_path}\t{elapsed_ms:.1f}ms\t{status}")
+    print(f"Fast path: {hits}/{len(pdf_paths)} ({hits / max(1, len(pdf_paths)):.0%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from agno.document.reader.pdf_reader import PDFReader
+from agno.knowledge.agent import AgentKnowledge
+from sqlalchemy import delete, func, select
+
+from embedding_cache import CachedEmbedder
+
+
+def file_hash(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class InvoiceIndex:
+    """One persistent PgVector table shared by every invoice.
+
+    Each invoice's chunks are stored with `{"doc_id": ..., "file_hash": ...,
+    "chunks": ...}` in the table's JSONB filters column. A file counts as
+    indexed only when all `chunks` rows for its doc_id and hash are present,
+    so ingesting it again is a no-op, while a changed file or one left
+    partially stored (a chunk that failed to embed, a crash mid-upsert) has
+    its old chunks replaced. Retrieval for an invoice is restricted to its
+    own doc_id.
+    """
+
+    def __init__(self, knowledge_base: AgentKnowledge, reader: Optional[PDFReader] = None):
+        self.knowledge_base = knowledge_base
+        self.vector_db = knowledge_base.vector_db
+        self.reader = reader or PDFReader(chunk=True)
+        self.loaded = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._created = False
+
+    def create(self):
+        """Create the table if it does not exist yet (never drops it)."""
+        if not self._created:
+            self.vector_db.create()
+            self._created = True
+
+    def is_indexed(self, doc_id: str, content_hash: str) -> bool:
+        table = self.vector_db.table
+        stmt = select(func.count(), func.min(table.c.filters["chunks"].as_integer())).where(
+            table.c.filters.contains({"doc_id": doc_id, "file_hash": content_hash})
+        )
+        with self.vector_db.Session() as sess:
+            stored, expected = sess.execute(stmt).one()
+        return stored > 0 and stored == expected
+
+    def remove(self, doc_id: str):
+        table = self.vector_db.table
+        with self.vector_db.Session() as sess, sess.begin():
+            sess.execute(delete(table).where(table.c.filters.contains({"doc_id": doc_id})))
+
+    def ingest(self, pdf_path: str | Path, doc_id: str) -> bool:
+        """Load one invoice into the table; returns False if it was already there."""
+        self.create()
+        content_hash = file_hash(pdf_path)
+        if self.is_indexed(doc_id, content_hash):
+            with self._lock:
+                self.skipped += 1
+            return False
+
+        # Drop chunks from an older version of this file before adding the new ones.
+        self.remove(doc_id)
+        documents = self.reader.read(pdf=Path(pdf_path))
+        for document in documents:
+            # Reader ids are derived from the file name only; make them unique per invoice.
+            document.id = f"{doc_id}:{document.id}"
+        if isinstance(self.vector_db.embedder, CachedEmbedder):
+            # Embed all chunks in one request up front; the per-chunk calls
+            # made during the upsert are then served from the cache.
+            self.vector_db.embedder.prefetch([document.content for document in documents])
+        chunks = len({document.id for document in documents})
+        self.knowledge_base.load_documents(
+            documents,
+            upsert=True,
+            skip_existing=False,
+            filters={"doc_id": doc_id, "file_hash": content_hash, "chunks": chunks},
+        )
+        # The upsert logs and skips chunks that fail to embed or insert; don't
+        # retrieve from an incomplete index, the next attempt re-ingests it.
+        if not self.is_indexed(doc_id, content_hash):
+            raise RuntimeError(f"Only part of {pdf_path} was stored in the knowledge base")
+        with self._lock:
+            self.loaded += 1
+        return True
+
+    def retriever(self, doc_id: str) -> Callable[..., Optional[list[dict[str, Any]]]]:
+        """Agent retriever that only searches the chunks of `doc_id`."""
+
+        def retrieve(agent, query: str, num_documents: Optional[int] = None, **kwargs):
+            documents = self.knowledge_base.search(
+                query=query, num_documents=num_documents, filters={"doc_id": doc_id}
+            )
+            return [document.to_dict() for document in documents] or None
+
+        return retrieve
+
+    def stats(self) -> dict:
+        return {"loaded": self.loaded, "skipped": self.skipped}
@@ -1,15 +1,23 @@
 import os
+import argparse
+import asyncio
+import json
 from agno.models.azure import AzureOpenAI
-from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Callable, Optional
 from agno.embedder.azure_openai import AzureOpenAIEmbedder
+from agno.embedder.base import Embedder
 from dotenv import load_dotenv
 from pathlib import Path
 from agno.knowledge.pdf import PDFKnowledgeBase, PDFReader
 from agno.vectordb.pgvector import PgVector, SearchType
 from agno.agent import Agent
-import time
 import pandas as pd
+from embedding_cache import CachedEmbedder
+from fast_parser import parse_invoice
+from invoice_index import InvoiceIndex, file_hash
+from output import Checkpoint, CsvInvoiceWriter, ParquetInvoiceWriter, ResultSink
+from models import InvoiceData
+from pipeline import InvoiceResult, process_concurrently
 
 load_dotenv()
 
@@ -20,23 +28,15 @@ DB_URL = "postgresql+psycopg://ai:ai@localhost:5532/ai"
 PDF_TABLE_NAME = "pdf_documents"
 INVOICE_FOLDER = "invoice"
 CSV_FILENAME = "invoice_data.csv"
-
-class InvoiceItem(BaseModel):
-    item: str = Field(..., description="Name of the item")
-    description: str = Field(..., description="Description of the item")
-    quantity: float = Field(..., description="Quantity of the item")
-    unit_price: float = Field(..., description="Unit price of the item")
-    tax: Optional[float] = Field(None, description="Tax amount for the item")
-    subtotal: float = Field(..., description="Subtotal for the item")
-
-
-class InvoiceData(BaseModel):
-    invoice_number: str = Field(..., description="Invoice number")
-    items: list[InvoiceItem] = Field(..., description="List of items in the invoice")
-    total_amount: float = Field(..., description="Total amount of the invoice")
-    total_tax: Optional[float] = Field(
-        None, description="Total tax amount for the invoice"
-    )
+PARQUET_DIRNAME = "invoice_data.parquet"
+MANIFEST_SUFFIX = "manifest.jsonl"
+REPORT_FILENAME = "invoice_report.csv"
+FAST_PATH = os.getenv("FAST_PATH", "1") != "0"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite")
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "8"))
+REQUESTS_PER_SECOND = float(os.getenv("REQUESTS_PER_SECOND", "0.5"))
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", "2"))
 
 def setup_azure_model():
     return AzureOpenAI(
@@ -54,7 +54,7 @@ def setup_azure_embedder():
         azure_deployment=AZURE_EMBEDDER_DEPLOYMENT,
     )
     
-def setup_pdf_knowledge_base(pdf_path: str | Path, azure_embedder: AzureOpenAIEmbedder):
+def setup_pdf_knowledge_base(pdf_path: str | Path, azure_embedder: Embedder):
     return PDFKnowledgeBase(
         path=pdf_path,
         vector_db=PgVector(
@@ -68,7 +68,11 @@ def setup_pdf_knowledge_base(pdf_path: str | Path, azure_embedder: AzureOpenAIEm
         optimize_on=1,
     )
 
-def setup_agent(azure_model: AzureOpenAI, pdf_knowledge_base: PDFKnowledgeBase):
+def setup_agent(
+    azure_model: AzureOpenAI,
+    pdf_knowledge_base: PDFKnowledgeBase,
+    retriever: Optional[Callable[..., Optional[list[dict]]]] = None,
+):
     return Agent(
         description="You are an expert Vansh product invoice data extractor. Your task is to meticulously extract and structure information from Vansh invoices, ensuring accuracy and completeness in the data you provide.",
         instructions="""
@@ -146,6 +150,7 @@ def setup_agent(azure_model: AzureOpenAI, pdf_knowledge_base: PDFKnowledgeBase):
         add_references=True,
         model=azure_model,
         knowledge=pdf_knowledge_base,
+        retriever=retriever,
         search_knowledge=True,
         markdown=False,
         response_model=InvoiceData,
@@ -153,56 +158,98 @@ def setup_agent(azure_model: AzureOpenAI, pdf_knowledge_base: PDFKnowledgeBase):
     )
     
 
-def process_invoices():
-    azure_model = setup_azure_model()
-    azure_embedder = setup_azure_embedder()
-    
-    pdf_files = [f for f in os.listdir(INVOICE_FOLDER) if f.endswith(".pdf")]
-    all_invoice_data = []
+async def extract_invoice(pdf_path: str, azure_model: AzureOpenAI, invoice_index: InvoiceIndex) -> InvoiceData:
+    doc_id = os.path.relpath(pdf_path, INVOICE_FOLDER)
+    # Loading (PDF parsing, embedding, inserts) is blocking, keep it off the event loop.
+    await asyncio.to_thread(invoice_index.ingest, pdf_path, doc_id)
 
-    for pdf_file in pdf_files:
-        pdf_path = os.path.join(INVOICE_FOLDER, pdf_file)
-        pdf_knowledge_base = setup_pdf_knowledge_base(pdf_path, azure_embedder)
-        pdf_knowledge_base.load(recreate=True, upsert=True)
+    agent = setup_agent(
+        azure_model, invoice_index.knowledge_base, invoice_index.retriever(doc_id)
+    )
+    response = await agent.arun("Extract the invoice data.")
+    if not isinstance(response.content, InvoiceData):
+        raise ValueError(f"Agent returned no structured invoice data: {response.content!r}")
+    return response.content
 
-        agent = setup_agent(azure_model, pdf_knowledge_base)
-        response = agent.run("Extract the invoice data.")
-        invoice_data: InvoiceData = response.content
-        all_invoice_data.append(invoice_data)
-        time.sleep(2)
 
-    return all_invoice_data
+async def parse_template_invoice(pdf_path: str):
+    # Template invoices are parsed locally; anything that fails validation goes to the agent.
+    return await asyncio.to_thread(parse_invoice, pdf_path)
 
-def create_dataframe(all_invoice_data: list[InvoiceData]):
-    return pd.DataFrame(
-        [
-            {
-                "invoice_number": inv.invoice_number,
-                "total_amount": inv.total_amount,
-                "total_tax": inv.total_tax,
-                "item": item.item,
-                "description": item.description,
-                "quantity": item.quantity,
-                "unit_price": item.unit_price,
-                "tax": item.tax,
-                "subtotal": item.subtotal,
-            }
-            for inv in all_invoice_data
-            for item in inv.items
-        ]
+
+async def process_invoices_async(pdf_paths: list[str], sink: ResultSink, file_hashes: dict[str, str]):
+    azure_model = setup_azure_model()
+    embedder = CachedEmbedder(embedder=setup_azure_embedder(), cache_path=EMBEDDING_CACHE_PATH)
+    pdf_knowledge_base = setup_pdf_knowledge_base(INVOICE_FOLDER, embedder)
+    invoice_index = InvoiceIndex(pdf_knowledge_base, pdf_knowledge_base.reader)
+    await asyncio.to_thread(invoice_index.create)
+
+    def report(result: InvoiceResult):
+        if result.ok:
+            sink.add(os.path.relpath(result.pdf_path, INVOICE_FOLDER), file_hashes[result.pdf_path], result.data)
+            # The rows are written out; don't keep every invoice in memory for the whole run.
+            result.data = None
+            print(f"Extracted {result.pdf_path} via {result.source} in {result.latency:.2f}s ({result.attempts} attempt(s))")
+        else:
+            print(f"Failed {result.pdf_path} after {result.attempts} attempt(s): {result.error}")
+
+    stats = await process_concurrently(
+        pdf_paths,
+        lambda pdf_path: extract_invoice(pdf_path, azure_model, invoice_index),
+        concurrency=MAX_CONCURRENCY,
+        requests_per_second=REQUESTS_PER_SECOND,
+        max_retries=MAX_RETRIES,
+        backoff=RETRY_BACKOFF,
+        on_result=report,
+        fast_path=parse_template_invoice if FAST_PATH else None,
     )
+    print(f"Knowledge base: {invoice_index.stats()}")
+    print(f"Embeddings: {embedder.stats()}")
+    embedder.close()
+    return stats
+
+
+def process_invoices(sink: ResultSink):
+    pdf_files = sorted(f for f in os.listdir(INVOICE_FOLDER) if f.endswith(".pdf"))
+    pdf_paths = [os.path.join(INVOICE_FOLDER, pdf_file) for pdf_file in pdf_files]
+    file_hashes = {pdf_path: file_hash(pdf_path) for pdf_path in pdf_paths}
+
+    pending = [
+        pdf_path
+        for pdf_path in pdf_paths
+        if not sink.checkpoint.is_done(os.path.relpath(pdf_path, INVOICE_FOLDER), file_hashes[pdf_path])
+    ]
+    if len(pending) < len(pdf_paths):
+        print(f"Resuming: {len(pdf_paths) - len(pending)} of {len(pdf_paths)} invoices already done")
+
+    stats = asyncio.run(process_invoices_async(pending, sink, file_hashes))
+    print(json.dumps(stats.summary(), indent=2))
+    pd.DataFrame(stats.rows()).to_csv(REPORT_FILENAME, index=False)
+    print(f"Per-invoice report written to '{REPORT_FILENAME}'.")
+    return stats
 
 def main():
-    all_invoice_data = process_invoices()
-    print(all_invoice_data)
-    
-    df = create_dataframe(all_invoice_data)
-    print(df)
-
-    df.to_csv(CSV_FILENAME, index=False)
-    print(
-        f"CSV file '{CSV_FILENAME}' has been created with all extracted invoice data."
+    parser = argparse.ArgumentParser(description="Extract Vansh invoice data from PDFs")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", help=f"Output path (default: {CSV_FILENAME} or {PARQUET_DIRNAME})")
+    parser.add_argument(
+        "--resume", action="store_true", help="Skip invoices already in the checkpoint and append to the output"
     )
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        output = args.output or PARQUET_DIRNAME
+        writer = ParquetInvoiceWriter(output, append=args.resume)
+    else:
+        output = args.output or CSV_FILENAME
+        writer = CsvInvoiceWriter(output, append=args.resume)
+    sink = ResultSink(writer, Checkpoint(f"{output}.{MANIFEST_SUFFIX}", resume=args.resume))
+
+    try:
+        process_invoices(sink)
+    finally:
+        sink.close()
+    print(f"Wrote {sink.rows} rows from {sink.invoices} invoices to '{output}'.")
 
 if __name__ == "__main__":
     main()
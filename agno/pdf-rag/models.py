@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class InvoiceItem(BaseModel):
+    item: str = Field(..., description="Name of the item")
+    description: str = Field(..., description="Description of the item")
+    quantity: float = Field(..., description="Quantity of the item")
+    unit_price: float = Field(..., description="Unit price of the item")
+    tax: Optional[float] = Field(None, description="Tax amount for the item")
+    subtotal: float = Field(..., description="Subtotal for the item")
+
+
+class InvoiceData(BaseModel):
+    invoice_number: str = Field(..., description="Invoice number")
+    items: list[InvoiceItem] = Field(..., description="List of items in the invoice")
+    total_amount: float = Field(..., description="Total amount of the invoice")
+    total_tax: Optional[float] = Field(
+        None, description="Total tax amount for the invoice"
+    )
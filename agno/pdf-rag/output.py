@@ -0,0 +1,206 @@
+import csv
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+COLUMNS = [
+    "invoice_number",
+    "total_amount",
+    "total_tax",
+    "item",
+    "description",
+    "quantity",
+    "unit_price",
+    "tax",
+    "subtotal",
+]
+
+
+def invoice_rows(invoice: Any) -> list[dict]:
+    """One row per line item, with the invoice-level fields repeated."""
+    return [
+        {
+            "invoice_number": invoice.invoice_number,
+            "total_amount": invoice.total_amount,
+            "total_tax": invoice.total_tax,
+            "item": item.item,
+            "description": item.description,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "tax": item.tax,
+            "subtotal": item.subtotal,
+        }
+        for item in invoice.items
+    ]
+
+
+class CsvInvoiceWriter:
+    """Appends rows to a CSV file, flushed to disk after every invoice."""
+
+    def __init__(self, path: str | Path, append: bool = False):
+        self.path = Path(path)
+        write_header = not (append and self.path.exists() and self.path.stat().st_size > 0)
+        self._file = open(self.path, "a" if append else "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+        if write_header:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def write(self, rows: list[dict]) -> bool:
+        """Write an invoice's rows; returns True once they are on disk."""
+        self._writer.writerows(rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetInvoiceWriter:
+    """Writes rows to a Parquet dataset directory, one complete part file per flush.
+
+    Rows are buffered and written out every `row_group_size` rows. Each
+    flush writes a whole file under a temporary name, closes it (writing
+    the footer) and renames it into place, so every `part-*.parquet` in the
+    directory is readable and rows are never reported durable before their
+    file is. A resumed run adds new parts next to the existing ones and
+    removes leftovers of an interrupted flush; `pd.read_parquet(path)`
+    reads the parts back as one table.
+    """
+
+    def __init__(self, path: str | Path, append: bool = False, row_group_size: int = 5000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs pyarrow: run `uv sync`") from e
+
+        self._pa = pa
+        self._pq = pq
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        for tmp in self.path.glob("*.tmp"):
+            tmp.unlink()
+        for part in self.path.glob("part-*.parquet"):
+            if not append or not self._readable(part):
+                part.unlink()
+        self.schema = pa.schema(
+            [
+                ("invoice_number", pa.string()),
+                ("total_amount", pa.float64()),
+                ("total_tax", pa.float64()),
+                ("item", pa.string()),
+                ("description", pa.string()),
+                ("quantity", pa.float64()),
+                ("unit_price", pa.float64()),
+                ("tax", pa.float64()),
+                ("subtotal", pa.float64()),
+            ]
+        )
+        self._run = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._parts = 0
+        self.row_group_size = row_group_size
+        self._rows: list[dict] = []
+
+    def _readable(self, part: Path) -> bool:
+        try:
+            self._pq.read_metadata(part)
+        except Exception:
+            return False
+        return True
+
+    def write(self, rows: list[dict]) -> bool:
+        """Buffer an invoice's rows; returns True when the buffer was written out."""
+        self._rows.extend(rows)
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        if not self._rows:
+            return
+        part = self.path / f"part-{self._run}-{self._parts:05d}.parquet"
+        tmp = part.with_name(part.name + ".tmp")
+        self._pq.write_table(self._pa.Table.from_pylist(self._rows, schema=self.schema), tmp)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, part)
+        self._parts += 1
+        self._rows = []
+
+    def close(self):
+        self.flush()
+
+
+class Checkpoint:
+    """Append-only JSONL manifest of invoices whose rows are safely written.
+
+    Each line records a file and its content hash, so a file that changed
+    since it was processed is picked up again on resume.
+    """
+
+    def __init__(self, path: str | Path, resume: bool = False):
+        self.path = Path(path)
+        self.done: set[tuple[str, str]] = set()
+        if resume and self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write.
+                        continue
+                    self.done.add((entry["file"], entry["file_hash"]))
+        elif self.path.exists():
+            self.path.unlink()
+        self._file = open(self.path, "a")
+
+    def is_done(self, file: str, file_hash: str) -> bool:
+        return (file, file_hash) in self.done
+
+    def mark_done(self, entries: Iterable[dict]):
+        for entry in entries:
+            self._file.write(json.dumps(entry) + "\n")
+            self.done.add((entry["file"], entry["file_hash"]))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class ResultSink:
+    """Streams each invoice to the writer and checkpoints it once it is durable.
+
+    Invoices are only recorded in the manifest after the writer reports
+    their rows on disk, so a crash can at worst repeat work, never lose it.
+    """
+
+    def __init__(self, writer: CsvInvoiceWriter | ParquetInvoiceWriter, checkpoint: Checkpoint):
+        self.writer = writer
+        self.checkpoint = checkpoint
+        self.invoices = 0
+        self.rows = 0
+        self._pending: list[dict] = []
+
+    def add(self, file: str, file_hash: str, invoice: Any):
+        rows = invoice_rows(invoice)
+        self._pending.append(
+            {"file": file, "file_hash": file_hash, "invoice_number": invoice.invoice_number}
+        )
+        if self.writer.write(rows):
+            self.checkpoint.mark_done(self._pending)
+            self._pending = []
+        self.invoices += 1
+        self.rows += len(rows)
+
+    def close(self):
+        self.writer.close()
+        if self._pending:
+            self.checkpoint.mark_done(self._pending)
+            self._pending = []
+        self.checkpoint.close()
@@ -0,0 +1,186 @@
+import asyncio
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter.
+
+    Allows bursts of up to `capacity` acquisitions, refilled continuously at
+    `rate` tokens per second. Waiters sleep only as long as needed for the
+    next token instead of a fixed delay.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+@dataclass
+class InvoiceResult:
+    pdf_path: str
+    data: Any = None
+    error: Optional[str] = None
+    attempts: int = 0
+    latency: float = 0.0
+    # "fast_path" or "agent"; fallback_reason says why the fast path was not used.
+    source: str = ""
+    fallback_reason: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class RunStats:
+    results: list[InvoiceResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> dict:
+        succeeded = [r for r in self.results if r.ok]
+        fast_path = [r for r in succeeded if r.source == "fast_path"]
+        return {
+            "invoices": len(self.results),
+            "succeeded": len(succeeded),
+            "failed": len(self.results) - len(succeeded),
+            "retries": sum(max(0, r.attempts - 1) for r in self.results),
+            "fast_path_hits": len(fast_path),
+            "fast_path_hit_rate": round(len(fast_path) / len(self.results), 3) if self.results else 0.0,
+            "elapsed_s": round(self.elapsed, 2),
+            "invoices_per_min": round(len(succeeded) / self.elapsed * 60, 2) if self.elapsed else 0.0,
+            "latency_s": latency_summary(succeeded),
+            "fast_path_latency_s": latency_summary(fast_path),
+            "agent_latency_s": latency_summary([r for r in succeeded if r.source == "agent"]),
+        }
+
+    def rows(self) -> list[dict]:
+        """Per-invoice report rows."""
+        return [
+            {
+                "pdf_path": r.pdf_path,
+                "source": r.source,
+                "ok": r.ok,
+                "latency_s": round(r.latency, 4),
+                "attempts": r.attempts,
+                "fallback_reason": r.fallback_reason or "",
+                "error": r.error or "",
+            }
+            for r in self.results
+        ]
+
+
+def latency_summary(results: list[InvoiceResult]) -> dict:
+    latencies = sorted(r.latency for r in results)
+
+    def pct(q: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    return {
+        "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "p50": round(pct(0.5), 3),
+        "p95": round(pct(0.95), 3),
+        "max": round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+async def run_with_retries(
+    extract: Callable[[str], Awaitable[Any]],
+    pdf_path: str,
+    limiter: TokenBucket,
+    max_retries: int,
+    backoff: float,
+    fast_path: Optional[Callable[[str], Awaitable[tuple[Any, Optional[str]]]]] = None,
+) -> InvoiceResult:
+    """Extract one invoice, retrying failures with jittered exponential backoff.
+
+    `fast_path`, if given, is tried first and outside the rate limit; it
+    returns (data, None) on success or (None, reason) to fall back.
+    """
+    result = InvoiceResult(pdf_path=pdf_path)
+    started = time.perf_counter()
+    if fast_path is not None:
+        try:
+            data, result.fallback_reason = await fast_path(pdf_path)
+        except Exception as e:
+            data, result.fallback_reason = None, f"{type(e).__name__}: {e}"
+        if data is not None:
+            result.data, result.source, result.attempts = data, "fast_path", 1
+            result.latency = time.perf_counter() - started
+            return result
+
+    result.source = "agent"
+    for attempt in range(max_retries + 1):
+        result.attempts = attempt + 1
+        await limiter.acquire()
+        try:
+            result.data = await extract(pdf_path)
+            result.error = None
+            break
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            if attempt < max_retries:
+                delay = backoff * 2**attempt * (0.5 + random.random())
+                print(f"Retrying {pdf_path} in {delay:.1f}s after {result.error}")
+                await asyncio.sleep(delay)
+    result.latency = time.perf_counter() - started
+    return result
+
+
+async def process_concurrently(
+    pdf_paths: list[str],
+    extract: Callable[[str], Awaitable[Any]],
+    concurrency: int = 8,
+    requests_per_second: float = 1.0,
+    max_retries: int = 3,
+    backoff: float = 2.0,
+    on_result: Optional[Callable[[InvoiceResult], None]] = None,
+    fast_path: Optional[Callable[[str], Awaitable[tuple[Any, Optional[str]]]]] = None,
+) -> RunStats:
+    """Run `extract` over every PDF with bounded concurrency and a shared rate limit.
+
+    At most `concurrency` invoices are in flight at once, and new attempts
+    (including retries) start no faster than `requests_per_second`.
+    `on_result` is called as each invoice finishes, in completion order.
+    Invoices handled by `fast_path` never touch the rate limiter.
+    """
+    limiter = TokenBucket(requests_per_second)
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = RunStats()
+
+    async def worker(pdf_path: str) -> InvoiceResult:
+        async with semaphore:
+            return await run_with_retries(extract, pdf_path, limiter, max_retries, backoff, fast_path)
+
+    started = time.perf_counter()
+    for finished in asyncio.as_completed([worker(path) for path in pdf_paths]):
+        result = await finished
+        stats.results.append(result)
+        if on_result is not None:
+            on_result(result)
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,258 @@
+"""Inference backends: the Keras SavedModel as-is, or an exported TFLite model.
+
+Every backend exposes the same small surface the service relies on:
+``input_shape``, ``predict_on_batch(batch)``, ``weight_bytes`` and
+``cache_tag``, which names the backend and quantization so cached outputs
+are never shared between them.
+
+The TFLite backend converts the Keras model once (optionally with float16 or
+int8 weights) and caches the flatbuffer next to the SavedModel, so later
+starts skip conversion. Use the command line to export ahead of time and to
+check the exported model against Keras on held-out images:
+
+    uv run python backends.py models/model_v3 --quantization dynamic \\
+        --verify-dir PlantVillage --samples 300
+"""
+
+import argparse
+import logging
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from preprocess import decode_image
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("keras", "tflite")
+QUANTIZATIONS = ("none", "float16", "dynamic", "int8")
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+class KerasBackend:
+    name = "keras"
+
+    cache_tag = "keras"
+
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = tuple(model.input_shape)
+        self.weight_bytes = sum(w.nbytes for w in model.get_weights())
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class TFLiteBackend:
+    """Runs a TFLite flatbuffer, keeping one interpreter per batch size.
+
+    Resizing an interpreter's input re-plans its tensor arena, which is slow,
+    so each batch size seen (the warm-up sizes, then whatever the batcher
+    produces) gets its own interpreter allocated once. Not thread-safe; the
+    service only calls it from the single inference thread.
+    """
+
+    name = "tflite"
+
+    def __init__(
+        self, model_content: bytes, num_threads: int | None = None, quantization: str = "none"
+    ):
+        self.model_content = model_content
+        self.num_threads = num_threads
+        self.cache_tag = f"{self.name}-{quantization}"
+        self.weight_bytes = len(model_content)
+        self._interpreters: dict[int, object] = {}
+
+        interpreter = self._interpreter_for(1)
+        self.input_shape = (None, *interpreter.get_input_details()[0]["shape"][1:])
+
+    def _interpreter_for(self, batch_size: int):
+        interpreter = self._interpreters.get(batch_size)
+        if interpreter is None:
+            import tensorflow as tf
+
+            interpreter = tf.lite.Interpreter(
+                model_content=self.model_content, num_threads=self.num_threads
+            )
+            input_index = interpreter.get_input_details()[0]["index"]
+            shape = interpreter.get_input_details()[0]["shape"].copy()
+            shape[0] = batch_size
+            interpreter.resize_tensor_input(input_index, shape, strict=False)
+            interpreter.allocate_tensors()
+            self._interpreters[batch_size] = interpreter
+        return interpreter
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        interpreter = self._interpreter_for(len(batch))
+        interpreter.set_tensor(interpreter.get_input_details()[0]["index"], batch)
+        interpreter.invoke()
+        return interpreter.get_tensor(interpreter.get_output_details()[0]["index"]).copy()
+
+
+def export_tflite(
+    keras_model,
+    quantization: str = "float16",
+    representative_images: np.ndarray | None = None,
+) -> bytes:
+    """Convert a Keras model to a TFLite flatbuffer.
+
+    ``float16`` halves weight size, ``dynamic`` stores weights as int8 and
+    quantizes activations on the fly, and ``int8`` quantizes weights and
+    activations using ``representative_images`` for calibration. Inputs and
+    outputs stay float32 in every mode, so callers don't change.
+    """
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantization == "int8":
+        if representative_images is None or not len(representative_images):
+            raise ValueError("int8 quantization needs representative images")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: (
+            [image[np.newaxis]] for image in representative_images
+        )
+    return converter.convert()
+
+
+def tflite_path(model_dir: str | Path, quantization: str) -> Path:
+    return Path(model_dir) / "export" / f"model_{quantization}.tflite"
+
+
+def load_backend(
+    model_dir: str,
+    backend: str = "keras",
+    quantization: str = "float16",
+    num_threads: int | None = None,
+):
+    """Load ``model_dir`` with the chosen backend; used as the registry's loader."""
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    if backend == "tflite" and quantization not in QUANTIZATIONS:
+        raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+
+    path = tflite_path(model_dir, quantization)
+    if backend == "tflite" and quantization == "int8" and not path.is_file():
+        # int8 needs calibration images, which the service does not have.
+        raise FileNotFoundError(
+            f"No int8 export at {path}; create it first with "
+            f"`python backends.py {model_dir} --quantization int8 --verify-dir <images>`"
+        )
+
+    import tf_keras
+
+    if backend == "keras":
+        return KerasBackend(tf_keras.models.load_model(model_dir))
+
+    if path.is_file():
+        return TFLiteBackend(path.read_bytes(), num_threads=num_threads, quantization=quantization)
+
+    logger.info("No %s found, converting %s (%s)", path.name, model_dir, quantization)
+    content = export_tflite(tf_keras.models.load_model(model_dir), quantization)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+    except OSError:
+        logger.warning("Could not cache converted model at %s", path)
+    return TFLiteBackend(content, num_threads=num_threads, quantization=quantization)
+
+
+def sample_paths(directory: Path, seed: int = 0) -> list[Path]:
+    """Every image under ``directory``, in a seeded random order."""
+    paths = sorted(p for p in directory.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    random.Random(seed).shuffle(paths)
+    return paths
+
+
+def load_samples(paths: list[Path], shape: tuple[int, int]) -> np.ndarray:
+    """Decode ``paths`` into one float32 batch."""
+    batch = np.empty((len(paths), *shape, 3), dtype=np.float32)
+    for row, path in enumerate(paths):
+        decode_image(path.read_bytes(), shape, out=batch[row])
+    return batch
+
+
+def verify_parity(reference, candidate, images: np.ndarray, batch_size: int = 32) -> dict:
+    """Compare two backends' probabilities and top-1 classes on the same images."""
+    diffs, agree = [], 0
+    for start in range(0, len(images), batch_size):
+        batch = images[start : start + batch_size]
+        expected = reference.predict_on_batch(batch)
+        actual = candidate.predict_on_batch(batch)
+        diffs.append(np.abs(expected - actual).max(axis=1))
+        agree += int((expected.argmax(axis=1) == actual.argmax(axis=1)).sum())
+
+    diffs = np.concatenate(diffs) if diffs else np.zeros(0)
+    return {
+        "samples": len(images),
+        "top1_agreement": agree / len(images) if len(images) else 0.0,
+        "max_abs_diff": float(diffs.max()) if len(diffs) else 0.0,
+        "mean_abs_diff": float(diffs.mean()) if len(diffs) else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a model to TFLite and check parity")
+    parser.add_argument("model_dir", type=Path)
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="float16")
+    parser.add_argument("--verify-dir", type=Path, help="Held-out images to compare on")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument(
+        "--min-agreement",
+        type=float,
+        default=0.99,
+        help="Exit non-zero if top-1 agreement with Keras falls below this",
+    )
+    args = parser.parse_args(argv)
+
+    import tf_keras
+
+    keras_model = tf_keras.models.load_model(args.model_dir)
+    reference = KerasBackend(keras_model)
+    shape = tuple(reference.input_shape[1:3])
+
+    if args.quantization == "int8" and not args.verify_dir:
+        parser.error("int8 quantization needs --verify-dir for calibration images")
+
+    samples = calibration = None
+    if args.verify_dir:
+        paths = sample_paths(args.verify_dir)
+        # Calibrate and verify on disjoint slices of one shuffle, so int8
+        # parity is measured on images the quantizer never saw.
+        calibration_paths = []
+        if args.quantization == "int8":
+            if len(paths) < 2:
+                parser.error("int8 quantization needs at least 2 images under --verify-dir")
+            calibration_paths = paths[: min(args.samples, len(paths) // 2)]
+            calibration = load_samples(calibration_paths, shape)
+        verify_paths = paths[len(calibration_paths) : len(calibration_paths) + args.samples]
+        samples = load_samples(verify_paths, shape)
+
+    content = export_tflite(keras_model, args.quantization, calibration)
+    path = tflite_path(args.model_dir, args.quantization)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    print(f"Wrote {path} ({len(content) / 2**20:.2f} MB, Keras weights {reference.weight_bytes / 2**20:.2f} MB)")
+
+    if samples is None:
+        return 0
+
+    report = verify_parity(reference, TFLiteBackend(content, quantization=args.quantization), samples)
+    print(
+        f"Parity on {report['samples']} images: top-1 agreement {report['top1_agreement']:.4f}, "
+        f"max |diff| {report['max_abs_diff']:.5f}, mean |diff| {report['mean_abs_diff']:.5f}"
+    )
+    return 0 if report["top1_agreement"] >= args.min_agreement else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Request-coalescing micro-batcher that sits in front of the Keras model."""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from executor import QueueFullError, StageTiming
+
+
+@dataclass
+class BatchTiming:
+    """Where one request spent its time inside the batcher, in seconds."""
+
+    batch_wait: float
+    inference: StageTiming
+    batch_size: int
+
+
+class MicroBatcher:
+    """Collects images submitted by concurrent requests and runs them as one batch.
+
+    The first image that arrives opens a window of ``max_wait_ms``; every image
+    submitted during that window (up to ``max_batch_size``) is stacked into a
+    single array and passed to ``predict_fn`` in one forward pass. Each caller
+    then receives its own row of the output.
+
+    ``predict_fn`` is awaited and must return the predictions together with a
+    ``StageTiming`` -- ``InferenceExecutor.run`` bound to the model fits, so the
+    forward pass never runs on the event loop. At most ``max_queue`` images may
+    wait for a batch; beyond that ``submit`` raises ``QueueFullError``.
+
+    Batches are assembled into a buffer preallocated per image shape and reused
+    for every forward pass, which is safe because batches run one at a time.
+    ``on_batch``, if given, is called with the size and timing of every batch.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], Awaitable[tuple[np.ndarray, StageTiming]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 256,
+        on_batch: Callable[[int, StageTiming], None] | None = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.on_batch = on_batch
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._buffers: dict[tuple, np.ndarray] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("MicroBatcher stopped"))
+
+    async def submit(self, image: np.ndarray) -> tuple[np.ndarray, BatchTiming]:
+        """Queue one image and wait for its prediction row."""
+        if not self.running:
+            raise RuntimeError("MicroBatcher is not running")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        try:
+            self._queue.put_nowait((image, future, loop.time()))
+        except asyncio.QueueFull:
+            raise QueueFullError("batch queue is full") from None
+        return await future
+
+    async def _collect(self) -> list[tuple[np.ndarray, asyncio.Future, float]]:
+        loop = asyncio.get_running_loop()
+        items = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            if not self._queue.empty():
+                items.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+
+            # Images of different shapes cannot be stacked, so each shape
+            # present in the window gets its own forward pass.
+            groups: dict[tuple, list[tuple[np.ndarray, asyncio.Future, float]]] = {}
+            for item in items:
+                image, future, _ = item
+                if not future.done():
+                    groups.setdefault(image.shape, []).append(item)
+
+            for group in groups.values():
+                await self._run_batch(group)
+
+    def _batch_buffer(self, image: np.ndarray, size: int) -> np.ndarray:
+        key = (image.shape, image.dtype)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = np.empty((self.max_batch_size, *image.shape), dtype=image.dtype)
+            self._buffers[key] = buffer
+        return buffer[:size]
+
+    async def _run_batch(self, group: list[tuple[np.ndarray, asyncio.Future, float]]):
+        started = asyncio.get_running_loop().time()
+        batch = self._batch_buffer(group[0][0], len(group))
+        np.stack([image for image, _, _ in group], out=batch)
+        try:
+            predictions, inference = await self.predict_fn(batch)
+        except Exception as exc:
+            for _, future, _ in group:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        if self.on_batch is not None:
+            self.on_batch(len(group), inference)
+
+        for (_, future, enqueued), prediction in zip(group, predictions):
+            if not future.done():
+                future.set_result(
+                    (prediction, BatchTiming(started - enqueued, inference, len(group)))
+                )
@@ -0,0 +1,287 @@
+"""Load-test the prediction API in-process against a small stand-in model.
+
+Builds a tiny Keras model with the same input/output contract as the real
+classifier (so no GPU or downloaded weights are needed), starts the FastAPI
+app in-process, and sweeps concurrency levels and upload image sizes against
+``/predict`` (and optionally ``/predict/batch``). Each run reports throughput,
+latency percentiles and process RSS; the full sweep is written as JSON so
+runs before and after a change can be compared.
+
+    uv run python benchmark.py --concurrency 1 8 32 --image-sizes 256 1024 \\
+        --requests 200 --output bench_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from metrics import process_rss_bytes
+
+STANDIN_VERSION = "standin_v1"
+IMAGE_SIZE = 256
+NUM_CLASSES = 3
+
+
+def build_standin_model(path: Path, image_size: int = IMAGE_SIZE):
+    """Save a small CNN shaped like the notebook model (resize/rescale, conv, softmax)."""
+    from tf_keras import Sequential, layers
+
+    model = Sequential(
+        [
+            layers.Input(shape=(image_size, image_size, 3)),
+            layers.Resizing(image_size, image_size),
+            layers.Rescaling(1.0 / 255),
+            layers.Conv2D(8, (3, 3), strides=2, activation="relu"),
+            layers.MaxPooling2D((2, 2)),
+            layers.Conv2D(16, (3, 3), strides=2, activation="relu"),
+            layers.GlobalAveragePooling2D(),
+            layers.Dense(NUM_CLASSES, activation="softmax"),
+        ]
+    )
+    model.save(path)
+
+
+def make_images(size: int, count: int, seed: int = 0) -> list[bytes]:
+    """Distinct random JPEGs, so the prediction cache never short-circuits a request."""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8)
+        buffer = BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def percentile(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+async def run_predict(client, images: list[bytes], concurrency: int, requests: int) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            data = images[i % len(images)]
+            started = time.perf_counter()
+            response = await client.post(
+                "/predict", files={"file": (f"{i}.jpg", data, "image/jpeg")}
+            )
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, statuses, elapsed, images_per_request=1)
+
+
+async def run_batch(
+    client, images: list[bytes], concurrency: int, requests: int, batch_images: int
+) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            files = [
+                ("files", (f"{i}_{j}.jpg", images[(i * batch_images + j) % len(images)], "image/jpeg"))
+                for j in range(batch_images)
+            ]
+            started = time.perf_counter()
+            response = await client.post("/predict/batch", files=files)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, statuses, elapsed, images_per_request=batch_images)
+
+
+def summarize(
+    latencies: list[float], statuses: dict[int, int], elapsed: float, images_per_request: int
+) -> dict:
+    ok = statuses.get(200, 0)
+    return {
+        "requests": len(latencies),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "elapsed_s": round(elapsed, 4),
+        "requests_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "images_per_s": round(ok * images_per_request / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(max(latencies, default=0.0) * 1000, 3),
+        },
+        "rss_mb": round(process_rss_bytes() / 2**20, 1),
+    }
+
+
+async def wait_until_ready(client, timeout: float = 300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = await client.get("/health/ready")
+        if response.status_code == 200:
+            return response.json()
+        if response.json().get("status") == "failed":
+            raise RuntimeError(f"Model failed to load: {response.json().get('error')}")
+        await asyncio.sleep(0.1)
+    raise TimeoutError("Service did not become ready")
+
+
+async def run_sweep(args) -> dict:
+    import httpx
+
+    import main as service
+
+    transport = httpx.ASGITransport(app=service.app)
+    results = []
+    async with service.app.router.lifespan_context(service.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=None
+        ) as client:
+            readiness = await wait_until_ready(client)
+
+            for size in args.image_sizes:
+                images = make_images(size, args.distinct_images, seed=size)
+                for concurrency in args.concurrency:
+                    # One untimed round so lazy allocations don't land in the numbers.
+                    await run_predict(client, images, concurrency, min(concurrency, args.requests))
+
+                    run = {
+                        "endpoint": "/predict",
+                        "image_size": size,
+                        "upload_kb": round(statistics.fmean(map(len, images)) / 1024, 1),
+                        "concurrency": concurrency,
+                        **await run_predict(client, images, concurrency, args.requests),
+                    }
+                    results.append(run)
+                    print_run(run)
+
+                    if args.batch_images:
+                        run = {
+                            "endpoint": "/predict/batch",
+                            "image_size": size,
+                            "concurrency": concurrency,
+                            "batch_images": args.batch_images,
+                            **await run_batch(
+                                client,
+                                images,
+                                concurrency,
+                                max(1, args.requests // args.batch_images),
+                                args.batch_images,
+                            ),
+                        }
+                        results.append(run)
+                        print_run(run)
+
+            metrics_text = (await client.get("/metrics")).text
+
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "backend": service.INFERENCE_BACKEND,
+            "tflite_quantization": service.TFLITE_QUANTIZATION,
+            "max_batch_size": service.MAX_BATCH_SIZE,
+            "max_batch_wait_ms": service.MAX_BATCH_WAIT_MS,
+            "max_queue_depth": service.MAX_QUEUE_DEPTH,
+            "decode_workers": service.DECODE_WORKERS,
+            "prediction_cache_size": service.PREDICTION_CACHE.max_entries,
+            "requests_per_run": args.requests,
+        },
+        "startup_timings_ms": readiness.get("startup_timings_ms", {}),
+        "runs": results,
+        "metrics": metrics_text if args.include_metrics else None,
+    }
+
+
+def print_run(run: dict):
+    latency = run["latency_ms"]
+    print(
+        f"{run['endpoint']:<15} size={run['image_size']:<5} conc={run['concurrency']:<4} "
+        f"{run['requests_per_s']:>8.1f} req/s {run['images_per_s']:>8.1f} img/s  "
+        f"p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms p99={latency['p99']:.1f}ms  "
+        f"rss={run['rss_mb']}MB status={run['status_codes']}"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--image-sizes", type=int, nargs="+", default=[256, 1024, 3000])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per run")
+    parser.add_argument("--distinct-images", type=int, default=64)
+    parser.add_argument(
+        "--batch-images",
+        type=int,
+        default=0,
+        help="Also benchmark /predict/batch with this many images per request",
+    )
+    parser.add_argument(
+        "--models-dir",
+        type=Path,
+        default=None,
+        help="Serve real models from here instead of building a stand-in",
+    )
+    parser.add_argument("--model-version", default=STANDIN_VERSION)
+    parser.add_argument(
+        "--backend",
+        choices=("keras", "tflite"),
+        default="keras",
+        help="Inference backend to serve with (see backends.py)",
+    )
+    parser.add_argument("--tflite-quantization", default="float16")
+    parser.add_argument("--cache", action="store_true", help="Leave the prediction cache on")
+    parser.add_argument("--include-metrics", action="store_true")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        models_dir = args.models_dir
+        if models_dir is None:
+            models_dir = Path(scratch) / "models"
+            build_standin_model(models_dir / args.model_version)
+
+        # main.py reads its configuration from the environment at import time.
+        os.environ["MODELS_DIR"] = str(models_dir)
+        os.environ["MODEL_VERSIONS"] = args.model_version
+        os.environ["INFERENCE_BACKEND"] = args.backend
+        os.environ["TFLITE_QUANTIZATION"] = args.tflite_quantization
+        if not args.cache:
+            os.environ["PREDICTION_CACHE_SIZE"] = "0"
+            os.environ.pop("PREDICTION_CACHE_PATH", None)
+
+        report = asyncio.run(run_sweep(args))
+
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Content-addressed cache of model outputs, so identical uploads skip decode and inference."""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+
+class PredictionCache:
+    """LRU cache with a TTL, plus an optional SQLite tier that survives restarts.
+
+    Entries are keyed on a hash of the raw upload bytes, the model version and
+    the backend's cache tag, so a new model, backend or quantization never
+    serves predictions made by another. The in-memory
+    tier holds at most ``max_entries`` probability vectors (a few dozen bytes
+    each); the least recently used entry is evicted first. Lookups that miss in
+    memory fall through to the disk tier when ``disk_path`` is set, and disk
+    hits are promoted back into memory.
+
+    The disk tier is owned by a single background thread, so SQLite never
+    blocks the event loop. Writes are write-behind: ``put`` queues them, and
+    the thread commits everything queued in one WAL transaction. Every
+    ``prune_interval`` seconds it deletes expired rows and, past
+    ``max_disk_entries``, the rows closest to expiry.
+
+    The memory tier is not thread-safe: use the cache from the event loop only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 3600,
+        disk_path: str | Path | None = None,
+        max_disk_entries: int = 1_000_000,
+        prune_interval: float = 300,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.prune_interval = prune_interval
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db: sqlite3.Connection | None = None
+        self._disk: ThreadPoolExecutor | None = None
+        self._writes: list[tuple[str, float, bytes]] = []
+        self._writes_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._last_prune = 0.0
+        if disk_path:
+            self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prediction-cache")
+            # The connection is created and only ever used on the disk thread.
+            self._disk.submit(self._open, Path(disk_path)).result()
+
+    def _open(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS predictions "
+            "(key TEXT PRIMARY KEY, expires REAL NOT NULL, prediction BLOB NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS predictions_expires ON predictions (expires)")
+        self._prune()
+
+    @staticmethod
+    def key(data: bytes, model_version: str, cache_tag: str) -> str:
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        return f"{model_version}:{cache_tag}:{digest}"
+
+    async def get(self, key: str) -> np.ndarray | None:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, prediction = entry
+            if expires > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return prediction
+            del self._entries[key]
+
+        if self._disk is not None:
+            row = await asyncio.get_running_loop().run_in_executor(
+                self._disk, self._read, key, now
+            )
+            if row is not None:
+                expires, blob = row
+                prediction = np.frombuffer(blob, dtype=np.float32)
+                self._remember(key, expires, prediction)
+                self.disk_hits += 1
+                return prediction
+
+        self.misses += 1
+        return None
+
+    def _read(self, key: str, now: float) -> tuple[float, bytes] | None:
+        return self._db.execute(
+            "SELECT expires, prediction FROM predictions WHERE key = ? AND expires > ?",
+            (key, now),
+        ).fetchone()
+
+    def put(self, key: str, prediction: np.ndarray):
+        prediction = np.asarray(prediction, dtype=np.float32)
+        expires = time.time() + self.ttl_seconds
+        self._remember(key, expires, prediction)
+        if self._disk is not None:
+            with self._writes_lock:
+                self._writes.append((key, expires, prediction.tobytes()))
+                if self._flush_scheduled:
+                    return
+                self._flush_scheduled = True
+            self._disk.submit(self._flush)
+
+    def _flush(self):
+        with self._writes_lock:
+            writes, self._writes = self._writes, []
+            self._flush_scheduled = False
+        if self._db is None:
+            return
+        if writes:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions (key, expires, prediction) VALUES (?, ?, ?)",
+                    writes,
+                )
+        if time.monotonic() - self._last_prune >= self.prune_interval:
+            self._prune()
+
+    def _prune(self):
+        with self._db:
+            self._db.execute("DELETE FROM predictions WHERE expires < ?", (time.time(),))
+            (rows,) = self._db.execute("SELECT COUNT(*) FROM predictions").fetchone()
+            if rows > self.max_disk_entries:
+                self._db.execute(
+                    "DELETE FROM predictions WHERE key IN "
+                    "(SELECT key FROM predictions ORDER BY expires LIMIT ?)",
+                    (rows - self.max_disk_entries,),
+                )
+        self._last_prune = time.monotonic()
+
+    def _remember(self, key: str, expires: float, prediction: np.ndarray):
+        self._entries[key] = (expires, prediction)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _close_db(self):
+        self._flush()
+        self._db.close()
+        self._db = None
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.submit(self._close_db).result()
+            self._disk.shutdown()
+            self._disk = None
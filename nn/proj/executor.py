@@ -0,0 +1,70 @@
+"""Bounded thread pools that keep blocking decode/inference work off the event loop."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+class QueueFullError(Exception):
+    """Raised when an executor already has ``max_queue`` jobs in flight."""
+
+
+@dataclass
+class StageTiming:
+    """Wall-clock split of one job, in seconds."""
+
+    queue_wait: float
+    compute: float
+
+
+class InferenceExecutor:
+    """Thread pool with a queue-depth limit.
+
+    ``run`` rejects new work with ``QueueFullError`` instead of letting the
+    backlog grow without bound, so callers can shed load (HTTP 503) early.
+    The pending counter is only touched from the event loop thread.
+    """
+
+    def __init__(self, name: str, max_workers: int = 1, max_queue: int = 64):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: ThreadPoolExecutor | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable[..., Any], *args) -> tuple[Any, StageTiming]:
+        if self._pending >= self.max_queue:
+            raise QueueFullError(f"{self.name} executor is at capacity")
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.name
+            )
+
+        self._pending += 1
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started, time.perf_counter()
+
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(
+                self._pool, call
+            )
+        finally:
+            self._pending -= 1
+
+        return result, StageTiming(queue_wait=started - submitted, compute=finished - started)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
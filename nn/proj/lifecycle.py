@@ -0,0 +1,38 @@
+"""Startup bookkeeping: readiness flag and per-phase timings."""
+
+import time
+from contextlib import contextmanager
+
+
+class StartupState:
+    """Tracks whether the service can take predictions and how long startup took.
+
+    Liveness only means the process is up; readiness flips to true once the
+    model is loaded and warmed up. Each ``phase`` records its wall-clock
+    duration so cold-start cost can be broken down.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.error: str | None = None
+        self.timings: dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def mark_ready(self):
+        self.timings["total"] = time.perf_counter() - self._started
+        self.ready = True
+
+    def mark_failed(self, error: BaseException):
+        self.timings["total"] = time.perf_counter() - self._started
+        self.error = f"{type(error).__name__}: {error}"
+
+    def timings_ms(self) -> dict[str, float]:
+        return {name: round(seconds * 1000, 2) for name, seconds in self.timings.items()}
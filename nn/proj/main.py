@@ -1,14 +1,178 @@
-from fastapi import FastAPI, Request, UploadFile, File, HTTPException
+import os
+import asyncio
+import secrets
+import logging
+import shutil
+import tempfile
+import time
+from contextlib import ExitStack, asynccontextmanager, suppress
+from functools import partial
+from itertools import islice
+from typing import AsyncIterator, BinaryIO
+from fastapi import Depends, FastAPI, Header, Request, Response, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 import uvicorn
 import numpy as np
-from PIL import Image
-from io import BytesIO
-import tf_keras
+from PIL import UnidentifiedImageError
 
-MODEL = tf_keras.models.load_model("models/model_v3")
+from backends import load_backend
+from cache import PredictionCache
+from executor import InferenceExecutor, QueueFullError, StageTiming
+from lifecycle import StartupState
+from metrics import MetricsRegistry, labels, process_rss_bytes
+from preprocess import ImageTooLargeError, decode_image
+from registry import ModelEntry, ModelNotLoadedError, ModelRegistry
+from uploads import is_archive, is_readable_archive, iter_archive_images
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = os.getenv("MODELS_DIR", "models")
+# Versions (directory names under MODELS_DIR) loaded at startup; the first is active.
+MODEL_VERSIONS = [
+    version.strip()
+    for version in os.getenv("MODEL_VERSIONS", "model_v3").split(",")
+    if version.strip()
+]
 CLASS_NAMES = ["Early Blight", "Late Blight", "Healthy"]
+# Bearer token for the model admin routes (load, activate, canary, unload).
+# They are disabled entirely when it is unset.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+STARTUP = StartupState()
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Batch uploads are copied into temporary files held in memory up to this size.
+UPLOAD_SPOOL_BYTES = 1024 * 1024
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(50_000_000)))
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "32"))
+MAX_BATCH_WAIT_MS = float(os.getenv("MAX_BATCH_WAIT_MS", "5"))
+MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", "256"))
+WARMUP_BATCH_SIZES = [
+    int(size)
+    for size in os.getenv("WARMUP_BATCH_SIZES", f"1,{MAX_BATCH_SIZE}").split(",")
+    if size.strip()
+]
+DECODE_WORKERS = int(os.getenv("DECODE_WORKERS", str(os.cpu_count() or 1)))
+
+# "keras" serves the SavedModel directly; "tflite" serves an exported copy
+# (converted on first load) with TFLITE_QUANTIZATION applied to its weights.
+# int8 needs calibration images, so it must be exported with backends.py first.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")
+TFLITE_QUANTIZATION = os.getenv("TFLITE_QUANTIZATION", "float16")
+TFLITE_THREADS = int(os.getenv("TFLITE_THREADS", str(os.cpu_count() or 1)))
+
+# PIL releases the GIL while decoding, so decode gets several threads. The
+# model already parallelises internally, so inference gets exactly one.
+DECODE_EXECUTOR = InferenceExecutor(
+    "decode", max_workers=DECODE_WORKERS, max_queue=MAX_QUEUE_DEPTH
+)
+INFERENCE_EXECUTOR = InferenceExecutor(
+    "inference", max_workers=1, max_queue=MAX_QUEUE_DEPTH
+)
+
+PREDICTION_CACHE = PredictionCache(
+    max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "3600")),
+    disk_path=os.getenv("PREDICTION_CACHE_PATH") or None,
+    max_disk_entries=int(os.getenv("PREDICTION_CACHE_DISK_SIZE", "1000000")),
+)
+
+METRICS = MetricsRegistry()
+HTTP_REQUESTS = METRICS.counter(
+    "http_requests_total", "HTTP requests by route, method and status code"
+)
+HTTP_LATENCY = METRICS.histogram(
+    "http_request_duration_seconds", "Time to produce response headers, by route"
+)
+STAGE_LATENCY = METRICS.histogram(
+    "prediction_stage_seconds",
+    "Time spent per prediction stage (upload_read, decode, queue_wait, inference, serialization)",
+)
+BATCH_SIZES = METRICS.histogram(
+    "inference_batch_size",
+    "Images per forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+
+def record_batch(version: str, size: int, timing: StageTiming):
+    BATCH_SIZES.observe(size, source="micro_batcher", version=version)
+
+
+REGISTRY = ModelRegistry(
+    MODELS_DIR,
+    loader=partial(
+        load_backend,
+        backend=INFERENCE_BACKEND,
+        quantization=TFLITE_QUANTIZATION,
+        num_threads=TFLITE_THREADS,
+    ),
+    executor=INFERENCE_EXECUTOR,
+    default_class_names=CLASS_NAMES,
+    warmup_batch_sizes=WARMUP_BATCH_SIZES,
+    batcher_options={
+        "max_batch_size": MAX_BATCH_SIZE,
+        "max_wait_ms": MAX_BATCH_WAIT_MS,
+        "max_queue": MAX_QUEUE_DEPTH,
+    },
+    on_batch=record_batch,
+)
+
+METRICS.gauge(
+    "prediction_cache_lookups_total",
+    "Prediction cache lookups by result",
+    lambda: {
+        labels(result="hit"): PREDICTION_CACHE.hits,
+        labels(result="disk_hit"): PREDICTION_CACHE.disk_hits,
+        labels(result="miss"): PREDICTION_CACHE.misses,
+    },
+    kind="counter",
+)
+METRICS.gauge(
+    "prediction_cache_evictions_total",
+    "Least recently used entries evicted from the in-memory prediction cache",
+    lambda: {labels(): PREDICTION_CACHE.evictions},
+    kind="counter",
+)
+METRICS.gauge(
+    "prediction_cache_entries",
+    "Entries held in the in-memory prediction cache",
+    lambda: {labels(): len(PREDICTION_CACHE)},
+)
+METRICS.gauge(
+    "executor_pending_jobs",
+    "Jobs queued or running per executor",
+    lambda: {
+        labels(executor=executor.name): executor.pending
+        for executor in (DECODE_EXECUTOR, INFERENCE_EXECUTOR)
+    },
+)
+METRICS.gauge(
+    "model_inflight_requests",
+    "Requests currently holding each model version",
+    lambda: {
+        labels(version=version): REGISTRY.get(version).inflight
+        for version in REGISTRY.loaded_versions()
+    },
+)
+METRICS.gauge(
+    "model_weight_bytes",
+    "Memory held by each loaded model's weights",
+    lambda: {
+        labels(version=version): REGISTRY.get(version).weight_bytes
+        for version in REGISTRY.loaded_versions()
+    },
+)
+METRICS.gauge(
+    "process_resident_memory_bytes",
+    "Resident set size of the server process",
+    lambda: {labels(): process_rss_bytes()},
+)
+
 
 class PredictionResponse(BaseModel):
     prediction: str
@@ -16,9 +180,72 @@ class PredictionResponse(BaseModel):
     message: str
 
 
+class BatchPredictionRecord(PredictionResponse):
+    index: int
+    filename: str
+    prediction: str | None = None
+    confidence: float | None = None
+
+
 class HealthResponse(BaseModel):
     status: str
     message: str
+    ready: bool
+    startup_timings_ms: dict[str, float]
+
+
+class ModelInfo(BaseModel):
+    version: str
+    backend: str
+    class_names: list[str]
+    image_shape: tuple[int, int]
+    inflight: int
+    timings_ms: dict[str, float]
+
+
+class ModelsResponse(BaseModel):
+    active: str | None
+    canary: str | None
+    canary_percent: float
+    loaded: list[ModelInfo]
+    available: list[str]
+
+
+class CanaryRequest(BaseModel):
+    version: str | None = None
+    percent: float = Field(0.0, ge=0, le=100)
+
+
+async def load_and_warm_up():
+    """Load every startup model version (each is warmed up on load), then go ready."""
+    try:
+        for version in MODEL_VERSIONS:
+            with STARTUP.phase(f"load_{version}"):
+                entry = await REGISTRY.load(version)
+            for phase, seconds in entry.timings.items():
+                STARTUP.timings[f"{version}_{phase}"] = seconds
+    except Exception as exc:
+        logger.exception("Failed to load models from %s", MODELS_DIR)
+        STARTUP.mark_failed(exc)
+        return
+
+    STARTUP.mark_ready()
+    logger.info("Models %s ready, startup timings: %s", MODEL_VERSIONS, STARTUP.timings_ms())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup work runs in the background so the process is live (and
+    # /health answers) while the model loads; /health/ready gates traffic.
+    startup = asyncio.create_task(load_and_warm_up())
+    yield
+    startup.cancel()
+    with suppress(asyncio.CancelledError):
+        await startup
+    await REGISTRY.close()
+    DECODE_EXECUTOR.shutdown()
+    INFERENCE_EXECUTOR.shutdown()
+    PREDICTION_CACHE.close()
 
 
 app = FastAPI(
@@ -38,9 +265,21 @@ app = FastAPI(
     ### Endpoints:
     * `GET /` - Welcome message
     * `POST /predict` - Upload image for prediction
+    * `POST /predict/batch` - Upload many images (or a zip/tar) for NDJSON predictions
     * `GET /health` - Health check endpoint
+    * `GET /health/live` - Liveness probe
+    * `GET /health/ready` - Readiness probe (model loaded and warmed up)
+    * `GET /metrics` - Prometheus metrics (latency by stage, batch sizes, cache, memory)
+    * `GET /models` - Loaded and available model versions
+    * `POST /models/{version}/load` - Load a model version
+    * `POST /models/{version}/activate` - Make a loaded version the default
+    * `PUT /models/canary` - Route a percentage of traffic to a version
+    * `DELETE /models/{version}` - Unload a model version
+
+    The model admin routes need `Authorization: Bearer $ADMIN_TOKEN`.
     """,
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -68,6 +307,17 @@ async def add_security_headers(request: Request, call_next):
     return response
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    HTTP_REQUESTS.inc(method=request.method, path=path, status=response.status_code)
+    HTTP_LATENCY.observe(time.perf_counter() - started, path=path)
+    return response
+
+
 @app.get(
     "/",
     summary="Welcome Endpoint",
@@ -83,9 +333,49 @@ async def read_root():
     }
     
 
-def read_file_as_image(data) -> np.ndarray:
-    image= np.array(Image.open(BytesIO(data)))
-    return image
+def read_file_as_image(
+    data: bytes, shape: tuple[int, int], out: np.ndarray | None = None
+) -> np.ndarray:
+    return decode_image(
+        data,
+        shape,
+        out=out,
+        max_bytes=MAX_UPLOAD_BYTES,
+        max_pixels=MAX_IMAGE_PIXELS,
+    )
+
+
+def server_timing(**stages: float) -> str:
+    """Format stage durations (seconds) as a ``Server-Timing`` header value."""
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in stages.items())
+
+
+def require_ready():
+    if not STARTUP.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Model is not ready",
+            headers={"Retry-After": "5"},
+        )
+
+
+def describe_prediction(prediction: np.ndarray, class_names: list[str]) -> dict:
+    return {
+        "prediction": class_names[np.argmax(prediction)],
+        "confidence": float(np.max(prediction)),
+    }
+
+
+def prediction_json_response(
+    prediction: np.ndarray, class_names: list[str], headers: dict[str, str]
+) -> Response:
+    started = time.perf_counter()
+    body = PredictionResponse(
+        **describe_prediction(prediction, class_names),
+        message="Prediction completed successfully",
+    ).model_dump_json()
+    STAGE_LATENCY.observe(time.perf_counter() - started, stage="serialization")
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post(
     "/predict",
@@ -95,23 +385,227 @@ def read_file_as_image(data) -> np.ndarray:
 )
 async def predict(
     file: UploadFile = File(..., description="Image file to predict (JPEG, PNG)"),
-) -> PredictionResponse:
+    x_model_version: str | None = Header(
+        None, description="Serve this model version instead of the active one"
+    ),
+) -> Response:
+    require_ready()
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
-    
-    image = read_file_as_image(await file.read())
-    
-    img_batch = np.expand_dims(image, axis=0)
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Image is too large")
 
-    predictions = MODEL.predict(img_batch)
+    started = time.perf_counter()
+    data = await file.read()
+    STAGE_LATENCY.observe(time.perf_counter() - started, stage="upload_read")
 
-    predicted_class = np.argmax(predictions[0])
-    confidence = np.max(predictions[0])
+    try:
+        with REGISTRY.acquire(x_model_version) as entry:
+            headers = {"X-Model-Version": entry.version}
+            cache_key = PredictionCache.key(data, entry.version, entry.cache_tag)
+            cached = await PREDICTION_CACHE.get(cache_key)
+            if cached is not None:
+                headers["X-Cache"] = "HIT"
+                return prediction_json_response(cached, entry.class_names, headers)
 
-    return PredictionResponse(
-        prediction=CLASS_NAMES[predicted_class],
-        confidence=confidence,
-        message="Prediction completed successfully",
+            image, decode = await DECODE_EXECUTOR.run(
+                read_file_as_image, data, entry.image_shape
+            )
+            prediction, batch = await entry.batcher.submit(image)
+    except ModelNotLoadedError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except QueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    except ImageTooLargeError:
+        raise HTTPException(status_code=413, detail="Image is too large")
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=400, detail="Could not decode image")
+
+    queue_wait = decode.queue_wait + batch.batch_wait + batch.inference.queue_wait
+    STAGE_LATENCY.observe(decode.compute, stage="decode")
+    STAGE_LATENCY.observe(queue_wait, stage="queue_wait")
+    STAGE_LATENCY.observe(batch.inference.compute, stage="inference")
+
+    headers["Server-Timing"] = server_timing(
+        decode_queue=decode.queue_wait,
+        decode=decode.compute,
+        batch_wait=batch.batch_wait,
+        inference_queue=batch.inference.queue_wait,
+        inference=batch.inference.compute,
+    )
+    headers["X-Batch-Size"] = str(batch.batch_size)
+    headers["X-Cache"] = "MISS"
+    PREDICTION_CACHE.put(cache_key, prediction)
+
+    return prediction_json_response(prediction, entry.class_names, headers)
+
+
+async def spool_upload(file: UploadFile, owner: ExitStack, max_bytes: int | None) -> BinaryIO | None:
+    """Copy an upload into a temporary file closed with ``owner``.
+
+    FastAPI closes UploadFiles as soon as the endpoint returns, before a
+    StreamingResponse body runs, so the stream has to read its own copy.
+    Returns None without copying if the upload is over ``max_bytes``.
+    """
+    if max_bytes is not None and file.size is not None and file.size > max_bytes:
+        return None
+    spool = owner.enter_context(tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES))
+    await file.seek(0)
+    await asyncio.to_thread(shutil.copyfileobj, file.file, spool)
+    spool.seek(0)
+    return spool
+
+
+async def read_spool(spool: BinaryIO | None) -> bytes | None:
+    return None if spool is None else await asyncio.to_thread(spool.read)
+
+
+async def decode_upload(data: bytes | None, shape: tuple[int, int], out: np.ndarray):
+    # None marks an upload or archive member that was too large to read.
+    if data is None:
+        raise ImageTooLargeError("Image is too large")
+    return await DECODE_EXECUTOR.run(read_file_as_image, data, shape, out)
+
+
+async def iter_upload_chunks(
+    uploads: list[tuple[str, BinaryIO | None]], archive: bool, chunk_size: int
+) -> AsyncIterator[list[tuple[str, bytes | None]]]:
+    if archive:
+        members = iter_archive_images(uploads[0][1], MAX_UPLOAD_BYTES)
+        while True:
+            chunk, _ = await DECODE_EXECUTOR.run(lambda: list(islice(members, chunk_size)))
+            if not chunk:
+                return
+            yield chunk
+    else:
+        for start in range(0, len(uploads), chunk_size):
+            yield [
+                (filename, await read_spool(spool))
+                for filename, spool in uploads[start : start + chunk_size]
+            ]
+
+
+async def stream_batch_predictions(
+    chunks: AsyncIterator[list[tuple[str, bytes | None]]],
+    chunk_size: int,
+    entry: ModelEntry,
+    lease: ExitStack,
+) -> AsyncIterator[str]:
+    with lease:
+        async for line in _stream_batch_predictions(chunks, chunk_size, entry):
+            yield line
+
+
+async def _stream_batch_predictions(
+    chunks: AsyncIterator[list[tuple[str, bytes | None]]], chunk_size: int, entry: ModelEntry
+) -> AsyncIterator[str]:
+    # Every chunk is decoded straight into rows of this buffer, which is
+    # reused because each chunk's forward pass finishes before the next.
+    buffer = np.empty((chunk_size, *entry.image_shape, 3), dtype=np.float32)
+    index = 0
+    async for chunk in chunks:
+        decoded = await asyncio.gather(
+            *(
+                decode_upload(data, entry.image_shape, buffer[row])
+                for row, (_, data) in enumerate(chunk)
+            ),
+            return_exceptions=True,
+        )
+        ok = [row for row, result in enumerate(decoded) if not isinstance(result, BaseException)]
+        for row in ok:
+            STAGE_LATENCY.observe(decoded[row][1].compute, stage="decode")
+
+        predictions: dict[int, np.ndarray] = {}
+        busy = False
+        if ok:
+            batch = buffer[: len(chunk)] if len(ok) == len(chunk) else buffer[ok]
+            try:
+                output, inference = await INFERENCE_EXECUTOR.run(
+                    entry.model.predict_on_batch, batch
+                )
+                predictions = dict(zip(ok, output))
+                STAGE_LATENCY.observe(inference.queue_wait, stage="queue_wait")
+                STAGE_LATENCY.observe(inference.compute, stage="inference")
+                BATCH_SIZES.observe(len(ok), source="batch_endpoint", version=entry.version)
+            except QueueFullError:
+                busy = True
+
+        started = time.perf_counter()
+        for row, ((filename, _), result) in enumerate(zip(chunk, decoded)):
+            if row in predictions:
+                fields = {
+                    **describe_prediction(predictions[row], entry.class_names),
+                    "message": "Prediction completed successfully",
+                }
+            elif busy or isinstance(result, QueueFullError):
+                fields = {"message": "Server is busy, please retry shortly"}
+            elif isinstance(result, ImageTooLargeError):
+                fields = {"message": "Image is too large"}
+            else:
+                fields = {"message": "Could not decode image"}
+            record = BatchPredictionRecord(index=index, filename=filename or "", **fields)
+            yield record.model_dump_json() + "\n"
+            index += 1
+        STAGE_LATENCY.observe(time.perf_counter() - started, stage="serialization")
+
+
+@app.post(
+    "/predict/batch",
+    summary="Predict Image Batch",
+    description=(
+        "Upload many image files, or a single zip/tar archive of images, and "
+        "receive one NDJSON `BatchPredictionRecord` per image as each chunk finishes"
+    ),
+)
+async def predict_batch(
+    files: list[UploadFile] = File(
+        ..., description="Image files (JPEG, PNG) or one zip/tar archive"
+    ),
+    x_model_version: str | None = Header(
+        None, description="Serve this model version instead of the active one"
+    ),
+) -> StreamingResponse:
+    require_ready()
+    archive = len(files) == 1 and is_archive(files[0].filename, files[0].content_type)
+    if archive:
+        if not is_readable_archive(files[0].file):
+            raise HTTPException(status_code=400, detail="Could not read archive")
+    elif not all((f.content_type or "").startswith("image/") for f in files):
+        raise HTTPException(status_code=400, detail="File must be an image")
+
+    if INFERENCE_EXECUTOR.pending >= INFERENCE_EXECUTOR.max_queue:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    # The lease keeps the model loaded and the spooled uploads open for the
+    # whole stream. It is released when the stream finishes, or by the
+    # background task if it never starts.
+    lease = ExitStack()
+    try:
+        entry = lease.enter_context(REGISTRY.acquire(x_model_version))
+        # Archives are bounded per member while they are unpacked instead.
+        max_bytes = None if archive else MAX_UPLOAD_BYTES
+        uploads = [(f.filename or "", await spool_upload(f, lease, max_bytes)) for f in files]
+    except ModelNotLoadedError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except BaseException:
+        lease.close()
+        raise
+
+    return StreamingResponse(
+        stream_batch_predictions(
+            iter_upload_chunks(uploads, archive, MAX_BATCH_SIZE), MAX_BATCH_SIZE, entry, lease
+        ),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": entry.version},
+        background=BackgroundTask(lease.close),
     )
 
 
@@ -123,7 +617,158 @@ async def predict(
 )
 async def health_check():
     """Health check endpoint for monitoring."""
-    return HealthResponse(status="healthy", message="API is running properly")
+    if STARTUP.error:
+        message = f"Model failed to load: {STARTUP.error}"
+    elif not STARTUP.ready:
+        message = "API is running, model is loading"
+    else:
+        message = "API is running properly"
+    return HealthResponse(
+        status="healthy",
+        message=message,
+        ready=STARTUP.ready,
+        startup_timings_ms=STARTUP.timings_ms(),
+    )
+
+
+@app.get(
+    "/health/live",
+    summary="Liveness Probe",
+    description="Returns 200 as long as the process is serving requests",
+)
+async def liveness():
+    return {"status": "alive"}
+
+
+@app.get(
+    "/health/ready",
+    summary="Readiness Probe",
+    description="Returns 200 once the model is loaded and warmed up, 503 before that",
+)
+async def readiness():
+    if not STARTUP.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed" if STARTUP.error else "loading", "error": STARTUP.error},
+        )
+    return {"status": "ready", "startup_timings_ms": STARTUP.timings_ms()}
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Metrics",
+    description=(
+        "Prometheus text metrics: request rate, per-stage latency histograms with "
+        "p50/p95/p99, batch size distribution, cache counters and memory usage"
+    ),
+)
+async def metrics():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+async def require_admin(authorization: str | None = Header(None)):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Model admin API is disabled; set ADMIN_TOKEN")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or missing admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def models_status() -> ModelsResponse:
+    return ModelsResponse(
+        active=REGISTRY.active_version,
+        canary=REGISTRY.canary_version,
+        canary_percent=REGISTRY.canary_percent,
+        loaded=[
+            ModelInfo(
+                version=entry.version,
+                backend=entry.model.name,
+                class_names=entry.class_names,
+                image_shape=entry.image_shape,
+                inflight=entry.inflight,
+                timings_ms={k: round(v * 1000, 2) for k, v in entry.timings.items()},
+            )
+            for entry in map(REGISTRY.get, REGISTRY.loaded_versions())
+        ],
+        available=REGISTRY.available_versions(),
+    )
+
+
+@app.get(
+    "/models",
+    response_model=ModelsResponse,
+    summary="List Models",
+    description="Loaded model versions, routing state and versions available on disk",
+)
+async def list_models():
+    return models_status()
+
+
+@app.post(
+    "/models/{version}/load",
+    response_model=ModelsResponse,
+    summary="Load Model",
+    description="Load and warm up a model version from the models directory",
+    dependencies=[Depends(require_admin)],
+)
+async def load_model(version: str):
+    try:
+        await REGISTRY.load(version)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return models_status()
+
+
+@app.post(
+    "/models/{version}/activate",
+    response_model=ModelsResponse,
+    summary="Activate Model",
+    description="Atomically route default traffic to a loaded model version",
+    dependencies=[Depends(require_admin)],
+)
+async def activate_model(version: str):
+    try:
+        REGISTRY.activate(version)
+    except ModelNotLoadedError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return models_status()
+
+
+@app.put(
+    "/models/canary",
+    response_model=ModelsResponse,
+    summary="Set Canary",
+    description="Send a percentage of un-pinned traffic to a loaded model version (0 disables)",
+    dependencies=[Depends(require_admin)],
+)
+async def set_canary(canary: CanaryRequest):
+    try:
+        REGISTRY.set_canary(canary.version, canary.percent)
+    except ModelNotLoadedError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return models_status()
+
+
+@app.delete(
+    "/models/{version}",
+    response_model=ModelsResponse,
+    summary="Unload Model",
+    description="Stop routing to a model version, wait for its in-flight requests, then free it",
+    dependencies=[Depends(require_admin)],
+)
+async def unload_model(version: str):
+    try:
+        await REGISTRY.unload(version)
+    except ModelNotLoadedError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return models_status()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+"""Minimal in-process metrics rendered in the Prometheus text exposition format."""
+
+import bisect
+import os
+import resource
+import threading
+from collections import deque
+from typing import Callable, Iterable
+
+LabelKey = tuple[tuple[str, str], ...]
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _label_key(labels: dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: Iterable[tuple[str, str]]) -> str:
+    pairs = [f'{name}="{value}"' for name, value in key]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _quantile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Metric whose samples come from a callback evaluated at scrape time.
+
+    ``kind`` may be set to ``"counter"`` for monotonic values owned by another
+    object (for example cache hit counts).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], dict[LabelKey, float]],
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self.collect().items():
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram plus p50/p95/p99 over a sliding window.
+
+    Buckets, sum and count are exported as a Prometheus ``histogram``; the
+    quantiles of the most recent ``window`` observations per label set are
+    exported alongside as a ``summary`` named ``<name>_recent`` so they can be
+    read without a Prometheus server.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+        window: int = 2048,
+    ):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._series: dict[LabelKey, tuple[list[int], list[float], deque]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0, 0], deque(maxlen=self.window))
+                self._series[key] = series
+            counts, totals, recent = series
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            totals[0] += value
+            totals[1] += 1
+            recent.append(value)
+
+    def quantiles(self, **labels) -> dict[float, float]:
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            values = sorted(series[2]) if series else []
+        if not values:
+            return {}
+        return {q: _quantile(values, q) for q in QUANTILES}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        summary = [
+            f"# HELP {self.name}_recent {self.help} (last {self.window} observations)",
+            f"# TYPE {self.name}_recent summary",
+        ]
+        with self._lock:
+            snapshot = {
+                key: (list(counts), list(totals), sorted(recent))
+                for key, (counts, totals, recent) in self._series.items()
+            }
+
+        for key, (counts, (total, count), recent) in snapshot.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(key + (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+
+            for q in QUANTILES:
+                if recent:
+                    labels = _format_labels(key + (("quantile", str(q)),))
+                    summary.append(
+                        f"{self.name}_recent{labels} {_format_value(_quantile(recent, q))}"
+                    )
+            summary.append(f"{self.name}_recent_sum{_format_labels(key)} {_format_value(sum(recent))}")
+            summary.append(f"{self.name}_recent_count{_format_labels(key)} {len(recent)}")
+        return lines + summary
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, **kwargs) -> Histogram:
+        metric = Histogram(name, help, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], dict[LabelKey, float]],
+        kind: str = "gauge",
+    ) -> Gauge:
+        metric = Gauge(name, help, collect, kind)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def labels(**values) -> LabelKey:
+    """Build the label key a ``Gauge`` callback returns for one sample."""
+    return _label_key(values)
+
+
+def process_rss_bytes() -> float:
+    """Current resident set size, falling back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,58 @@
+"""Image decoding that goes straight from upload bytes to a model-sized float32 array."""
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# Modes Image.reduce() accepts; anything else (e.g. palette "P") is converted first.
+REDUCIBLE_MODES = {"L", "LA", "RGB", "RGBA", "RGBa", "CMYK", "YCbCr", "I", "F"}
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload exceeds the byte or pixel budget."""
+
+
+def decode_image(
+    data: bytes,
+    shape: tuple[int, int],
+    out: np.ndarray | None = None,
+    max_bytes: int | None = None,
+    max_pixels: int | None = None,
+) -> np.ndarray:
+    """Decode ``data`` into an ``(height, width, 3)`` float32 array of 0-255 RGB values.
+
+    Oversized payloads are rejected before any pixels are decoded: the byte
+    count is checked first, then the pixel count from the image header. JPEGs
+    are decoded at the smallest DCT scale that still covers ``shape``
+    (``Image.draft``); other formats are shrunk by an integer factor with
+    ``Image.reduce`` before the final resize. When ``out`` is given (for
+    example one row of a preallocated batch buffer) the result is written
+    into it, so no intermediate float array is allocated.
+    """
+    if max_bytes is not None and len(data) > max_bytes:
+        raise ImageTooLargeError(f"upload is {len(data)} bytes, limit is {max_bytes}")
+
+    height, width = shape
+    with Image.open(BytesIO(data)) as image:
+        if max_pixels is not None and image.width * image.height > max_pixels:
+            raise ImageTooLargeError(
+                f"image is {image.width}x{image.height}, limit is {max_pixels} pixels"
+            )
+
+        image.draft("RGB", (width, height))
+        if image.mode not in REDUCIBLE_MODES:
+            image = image.convert("RGB")
+
+        factor = min(image.width // width, image.height // height)
+        if factor > 1:
+            image = image.reduce(factor)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if image.size != (width, height):
+            image = image.resize((width, height), Image.Resampling.BILINEAR)
+
+        if out is None:
+            out = np.empty((height, width, 3), dtype=np.float32)
+        out[...] = np.asarray(image)
+    return out
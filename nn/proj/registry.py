@@ -0,0 +1,222 @@
+"""Registry of loaded model versions with request routing and hot swapping."""
+
+import asyncio
+import gc
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+from batcher import MicroBatcher
+from executor import InferenceExecutor, StageTiming
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotLoadedError(LookupError):
+    """Raised when a request names a version that is not loaded."""
+
+
+@dataclass
+class ModelEntry:
+    version: str
+    path: Path
+    model: Any
+    class_names: list[str]
+    image_shape: tuple[int, int]
+    batcher: MicroBatcher
+    weight_bytes: int = 0
+    cache_tag: str = ""
+    timings: dict[str, float] = field(default_factory=dict)
+    inflight: int = 0
+    idle: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def __post_init__(self):
+        self.idle.set()
+
+
+class ModelRegistry:
+    """Keeps several model versions loaded side by side and routes requests to them.
+
+    Every version gets its own ``MicroBatcher``; all of them share one
+    inference executor, so versions never run forward passes concurrently.
+    Requests pick a version with ``acquire``: an explicit version if given,
+    otherwise the canary for ``canary_percent`` of traffic, otherwise the
+    active version. Switching the active version is a single assignment, so
+    requests that already hold an entry finish on the model they started
+    with. ``unload`` stops routing to a version, waits for its in-flight
+    requests to finish, then drops the model so its memory can be reclaimed.
+    ``on_batch`` receives ``(version, batch_size, timing)`` for every batch.
+
+    ``loader`` turns a model directory into an object with ``input_shape``,
+    ``predict_on_batch``, ``weight_bytes`` and ``cache_tag`` (see
+    ``backends.load_backend``).
+    """
+
+    def __init__(
+        self,
+        models_dir: str | Path,
+        loader: Callable[[str], Any],
+        executor: InferenceExecutor,
+        default_class_names: list[str],
+        warmup_batch_sizes: list[int],
+        batcher_options: dict | None = None,
+        on_batch: Callable[[str, int, StageTiming], None] | None = None,
+    ):
+        self.models_dir = Path(models_dir)
+        self.loader = loader
+        self.executor = executor
+        self.default_class_names = default_class_names
+        self.warmup_batch_sizes = warmup_batch_sizes
+        self.batcher_options = batcher_options or {}
+        self.on_batch = on_batch
+
+        self._entries: dict[str, ModelEntry] = {}
+        self.active_version: str | None = None
+        self.canary_version: str | None = None
+        self.canary_percent: float = 0.0
+        self._admin_lock = asyncio.Lock()
+
+    def available_versions(self) -> list[str]:
+        if not self.models_dir.is_dir():
+            return []
+        return sorted(p.name for p in self.models_dir.iterdir() if p.is_dir())
+
+    def loaded_versions(self) -> list[str]:
+        return list(self._entries)
+
+    def get(self, version: str) -> ModelEntry:
+        try:
+            return self._entries[version]
+        except KeyError:
+            raise ModelNotLoadedError(f"Model version '{version}' is not loaded") from None
+
+    def _read_class_names(self, path: Path) -> list[str]:
+        class_names_file = path / "class_names.json"
+        if class_names_file.is_file():
+            return json.loads(class_names_file.read_text())
+        return self.default_class_names
+
+    async def load(self, version: str) -> ModelEntry:
+        """Load ``version`` from ``models_dir``, warm it up and start its batcher.
+
+        Loading an already loaded version is a no-op.
+        """
+        async with self._admin_lock:
+            if version in self._entries:
+                return self._entries[version]
+
+            # Only names listed in models_dir are accepted, so a version can
+            # never point outside it ("..", absolute paths, separators).
+            if version not in self.available_versions():
+                raise FileNotFoundError(f"No model version '{version}' in {self.models_dir}")
+            path = self.models_dir / version
+
+            timings = {}
+            started = time.perf_counter()
+            # Loading happens off the inference thread so other versions keep
+            # serving while a new one is read from disk.
+            model = await asyncio.to_thread(self.loader, str(path))
+            timings["load"] = time.perf_counter() - started
+            image_shape = tuple(model.input_shape[1:3])
+
+            for size in self.warmup_batch_sizes:
+                started = time.perf_counter()
+                await self.executor.run(
+                    model.predict_on_batch,
+                    np.zeros((size, *image_shape, 3), dtype=np.float32),
+                )
+                timings[f"warmup_batch_{size}"] = time.perf_counter() - started
+
+            batcher = MicroBatcher(
+                partial(self.executor.run, model.predict_on_batch),
+                on_batch=partial(self.on_batch, version) if self.on_batch else None,
+                **self.batcher_options,
+            )
+            await batcher.start()
+
+            entry = ModelEntry(
+                version=version,
+                path=path,
+                model=model,
+                class_names=self._read_class_names(path),
+                image_shape=image_shape,
+                batcher=batcher,
+                weight_bytes=model.weight_bytes,
+                cache_tag=model.cache_tag,
+                timings=timings,
+            )
+            self._entries[version] = entry
+            if self.active_version is None:
+                self.active_version = version
+            logger.info("Loaded model %s in %.2fs", version, sum(timings.values()))
+            return entry
+
+    def activate(self, version: str):
+        self.get(version)
+        self.active_version = version
+        if self.canary_version == version:
+            self.canary_version, self.canary_percent = None, 0.0
+        logger.info("Active model is now %s", version)
+
+    def set_canary(self, version: str | None, percent: float):
+        if not 0 <= percent <= 100:
+            raise ValueError("percent must be between 0 and 100")
+        if version is None or percent == 0:
+            self.canary_version, self.canary_percent = None, 0.0
+            return
+        self.get(version)
+        self.canary_version, self.canary_percent = version, percent
+
+    def resolve(self, version: str | None = None) -> ModelEntry:
+        if version:
+            return self.get(version)
+        if self.canary_version and random.uniform(0, 100) < self.canary_percent:
+            return self.get(self.canary_version)
+        if self.active_version is None:
+            raise ModelNotLoadedError("No model is loaded")
+        return self.get(self.active_version)
+
+    @contextmanager
+    def acquire(self, version: str | None = None) -> Iterator[ModelEntry]:
+        """Route a request to a model and keep that model loaded until it finishes."""
+        entry = self.resolve(version)
+        entry.inflight += 1
+        entry.idle.clear()
+        try:
+            yield entry
+        finally:
+            entry.inflight -= 1
+            if entry.inflight == 0:
+                entry.idle.set()
+
+    async def unload(self, version: str):
+        async with self._admin_lock:
+            if version == self.active_version:
+                raise ValueError("Cannot unload the active model; activate another first")
+            entry = self.get(version)
+            if self.canary_version == version:
+                self.canary_version, self.canary_percent = None, 0.0
+            del self._entries[version]
+
+        # Drain outside the lock: a long batch stream on this version must
+        # not hold up every other admin operation.
+        await entry.idle.wait()
+        await entry.batcher.stop()
+        entry.model = None
+        del entry
+        gc.collect()
+        logger.info("Unloaded model %s", version)
+
+    async def close(self):
+        for entry in list(self._entries.values()):
+            await entry.batcher.stop()
+        self._entries.clear()
+        self.active_version = None
@@ -0,0 +1,72 @@
+"""Helpers for unpacking multi-image uploads (zip and tar archives)."""
+
+import tarfile
+import zipfile
+from pathlib import PurePosixPath
+from typing import BinaryIO, Iterator
+
+ARCHIVE_CONTENT_TYPES = {
+    "application/zip",
+    "application/x-zip-compressed",
+    "application/x-tar",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-gtar",
+}
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+
+
+def is_archive(filename: str | None, content_type: str | None) -> bool:
+    if content_type in ARCHIVE_CONTENT_TYPES:
+        return True
+    return bool(filename) and filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _is_image_member(name: str) -> bool:
+    path = PurePosixPath(name)
+    if any(part.startswith((".", "__MACOSX")) for part in path.parts):
+        return False
+    return path.suffix.lower() in IMAGE_SUFFIXES
+
+
+def is_readable_archive(fileobj: BinaryIO) -> bool:
+    fileobj.seek(0)
+    if zipfile.is_zipfile(fileobj):
+        return True
+    fileobj.seek(0)
+    return tarfile.is_tarfile(fileobj)
+
+
+def iter_archive_images(
+    fileobj: BinaryIO, max_member_bytes: int | None = None
+) -> Iterator[tuple[str, bytes | None]]:
+    """Yield ``(member name, bytes)`` for every image inside a zip or tar stream.
+
+    Members are read one at a time, so only the current image is held in memory.
+    Members whose uncompressed size is over ``max_member_bytes`` are not
+    decompressed at all and are yielded as ``(name, None)``.
+    """
+    fileobj.seek(0)
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_image_member(info.filename):
+                    continue
+                # zipfile never returns more than the declared file_size.
+                if max_member_bytes is not None and info.file_size > max_member_bytes:
+                    yield info.filename, None
+                else:
+                    yield info.filename, archive.read(info)
+        return
+
+    fileobj.seek(0)
+    with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+        for member in archive:
+            if not member.isfile() or not _is_image_member(member.name):
+                continue
+            if max_member_bytes is not None and member.size > max_member_bytes:
+                yield member.name, None
+            else:
+                yield member.name, archive.extractfile(member).read()
@@ -0,0 +1,78 @@
+"""Sentences/sec of document encoding in-process vs. with N worker processes.
+
+    uv run python -m benchmarks.encode_pool --workers 0 1 2 4 8 --sentences 4000
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import time
+from sentence_transformers import SentenceTransformer
+from settings import settings
+from src.encode_pool import EncodePool
+
+WORDS = (
+    "court contract party agreement clause liability damages notice breach term "
+    "plaintiff defendant evidence statute appeal judgment counsel filing motion"
+).split()
+
+
+def make_sentences(count: int, seed: int = 0):
+    """Random sentences with a wide spread of lengths, like real chunks."""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(5, 200)))
+        for _ in range(count)
+    ]
+
+
+def measure(encode, sentences, repeat: int) -> float:
+    encode(sentences[: min(len(sentences), 64)])
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode(sentences)
+        best = min(best, time.perf_counter() - started)
+    return len(sentences) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=settings.encode_batch_size)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    sentences = make_sentences(args.sentences)
+    results = []
+    for workers in args.workers:
+        if workers == 0:
+            model = SentenceTransformer(
+                args.model, cache_folder=settings.hf_cache_dir, trust_remote_code=True)
+            rate = measure(
+                lambda s: model.encode(s, batch_size=args.batch_size, show_progress_bar=False),
+                sentences, args.repeat)
+            del model
+        else:
+            with EncodePool(args.model, workers, args.batch_size) as pool:
+                rate = measure(pool.encode, sentences, args.repeat)
+
+        results.append({"workers": workers, "sentences_per_s": round(rate, 1)})
+        print(f"workers={workers:<3} {rate:>10.1f} sentences/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "model": args.model,
+                "cpu_count": multiprocessing.cpu_count(),
+                "sentences": args.sentences,
+                "batch_size": args.batch_size,
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
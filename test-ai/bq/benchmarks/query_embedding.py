@@ -0,0 +1,67 @@
+"""Per-query latency of one-at-a-time, batched and cached query embedding.
+
+    uv run python -m benchmarks.query_embedding --queries 256 --repeat 3
+"""
+import argparse
+import json
+import time
+from settings import settings
+from src.embed_data import EmbedData
+from benchmarks.encode_pool import make_sentences
+
+
+def timed(fn, repeat: int) -> float:
+    """Best wall time of fn over repeat runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    embed_data = EmbedData(embed_model_name=args.model)
+    queries = [sentence[:200] for sentence in make_sentences(args.queries, seed=1)]
+    embed_data.embed_queries(queries[:8])
+
+    def uncached(fn):
+        def run():
+            embed_data.query_cache.clear()
+            fn()
+        return run
+
+    paths = {
+        "single": uncached(lambda: [embed_data.embed_queries([q]) for q in queries]),
+        "batched": uncached(lambda: embed_data.embed_queries(queries)),
+    }
+    paths["cached"] = lambda: embed_data.embed_queries(queries)
+
+    results = []
+    for name, fn in paths.items():
+        if name == "cached":
+            # The uncached runs cleared the cache; fill it before timing.
+            embed_data.embed_queries(queries)
+        seconds = timed(fn, args.repeat)
+        results.append({
+            "path": name,
+            "queries": len(queries),
+            "total_ms": round(seconds * 1000, 3),
+            "per_query_ms": round(seconds * 1000 / len(queries), 4),
+        })
+        print(f"{name:<8} {seconds * 1000:>10.2f} ms total {seconds * 1000 / len(queries):>9.4f} ms/query")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Ingestion throughput, index size, query latency and recall of binary vs. float search.
+
+Builds an index with EmbedData for every combination of the swept settings
+and writes one row per combination to JSON and CSV. By default it runs
+offline: the corpus is synthetic and the embedding model is a hashing
+stand-in with the same encode() interface as SentenceTransformer. Pass
+--model to use a real model and --corpus to use a PDF or text file.
+
+    uv run python -m benchmarks.retrieval --vector-dims 256 1024 \\
+        --batch-sizes 64 512 --top-ks 3 10 --oversampling 1 4 16
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import random
+import time
+import numpy as np
+from pathlib import Path
+from settings import settings
+from src.embed_data import EmbedData
+from src.ingest import chunk_text, read_pages
+from src.retriever import Retriever, exact_search, recall_at_k
+
+
+class HashingEncoder:
+    """Offline stand-in for SentenceTransformer: a sum of per-token random vectors.
+
+    Texts that share words get similar vectors, which is enough structure
+    for recall numbers to mean something without downloading a model.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._tokens = {}
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._tokens.get(token)
+        if vector is None:
+            seed = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._tokens[token] = vector
+        return vector
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True,
+               normalize_embeddings=False, show_progress_bar=False):
+        out = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for token in sentence.lower().split():
+                out[row] += self._token_vector(token)
+        return out
+
+
+class StandInEmbedData(EmbedData):
+    def __init__(self, dim: int, **kwargs):
+        self._dim = dim
+        super().__init__(embed_model_name=f"hashing-{dim}", **kwargs)
+
+    def _load_embed_model(self):
+        return HashingEncoder(self._dim)
+
+
+def synthetic_corpus(chunks: int, topics: int = 50, seed: int = 0) -> list:
+    """Chunks drawn from overlapping topic vocabularies, like sections of documents."""
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    topic_words = [rng.sample(vocabulary, 80) for _ in range(topics)]
+    corpus = []
+    for _ in range(chunks):
+        words = rng.choice(topic_words)
+        corpus.append(" ".join(rng.choices(words, k=rng.randint(40, 160))
+                               + rng.choices(vocabulary, k=20)))
+    return corpus
+
+
+def load_corpus(path: str) -> list:
+    if path.lower().endswith(".pdf"):
+        return list(chunk_text(read_pages(path)))
+    return list(chunk_text([Path(path).read_text()]))
+
+
+def make_queries(corpus: list, count: int, seed: int = 1) -> list:
+    """Queries made of a random handful of words from random chunks."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        words = rng.choice(corpus).split()
+        queries.append(" ".join(rng.sample(words, min(len(words), 12))))
+    return queries
+
+
+def percentile_ms(seconds: list, q: float) -> float:
+    return round(float(np.percentile(seconds, q)) * 1000, 4) if seconds else 0.0
+
+
+def time_queries(search, queries: np.ndarray) -> tuple:
+    ids, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        ids.append(search(query)[0])
+        latencies.append(time.perf_counter() - started)
+    return np.concatenate(ids), latencies
+
+
+def build(args, corpus, dim, batch_size) -> tuple:
+    """Embed the corpus into a fresh index; returns it with the ingest time."""
+    if args.model:
+        embed_data = EmbedData(embed_model_name=args.model, batch_size=batch_size)
+    else:
+        embed_data = StandInEmbedData(dim, batch_size=batch_size)
+
+    started = time.perf_counter()
+    embed_data.embed(corpus)
+    return embed_data, time.perf_counter() - started
+
+
+def evaluate(embed_data, queries, top_k, oversampling) -> dict:
+    query_embeddings, query_codes = embed_data.embed_queries(queries)
+    embeddings = embed_data.embeddings
+
+    expected, float_latency = time_queries(
+        lambda q: exact_search(embeddings, q, top_k), query_embeddings)
+    binary, binary_latency = time_queries(
+        lambda code: embed_data.binary_index.search(code, top_k), query_codes)
+    retriever = Retriever(embed_data.binary_index, embeddings, oversampling)
+    rescored, rescored_latency = time_queries(
+        lambda q: retriever.search(q, top_k), query_embeddings)
+
+    return {
+        "float_p50_ms": percentile_ms(float_latency, 50),
+        "float_p99_ms": percentile_ms(float_latency, 99),
+        "binary_p50_ms": percentile_ms(binary_latency, 50),
+        "binary_p99_ms": percentile_ms(binary_latency, 99),
+        "rescored_p50_ms": percentile_ms(rescored_latency, 50),
+        "rescored_p99_ms": percentile_ms(rescored_latency, 99),
+        "binary_recall": round(recall_at_k(binary, expected), 4),
+        "rescored_recall": round(recall_at_k(rescored, expected), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", help="Real sentence-transformers model (default: offline stand-in)")
+    parser.add_argument("--corpus", help="PDF or text file to chunk (default: synthetic)")
+    parser.add_argument("--chunks", type=int, default=20_000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--vector-dims", type=int, nargs="+", default=[settings.vector_dim],
+                        help="Stand-in model dimensions (ignored with --model)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[settings.batch_size])
+    parser.add_argument("--top-ks", type=int, nargs="+", default=[settings.top_k])
+    parser.add_argument("--oversampling", type=int, nargs="+", default=[settings.rerank_oversampling])
+    parser.add_argument("--output", default="retrieval_benchmark",
+                        help="Report path without extension; .json and .csv are written")
+    args = parser.parse_args()
+
+    # Measure encoding, not the on-disk embedding cache.
+    settings.embedding_cache = False
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.chunks)
+    queries = make_queries(corpus, args.queries)
+    dims = [None] if args.model else args.vector_dims
+
+    rows = []
+    for dim, batch_size in itertools.product(dims, args.batch_sizes):
+        embed_data, ingest_seconds = build(args, corpus, dim, batch_size)
+        for top_k, oversampling in itertools.product(args.top_ks, args.oversampling):
+            row = {
+                "model": args.model or "hashing-stand-in",
+                "vector_dim": embed_data.embeddings.shape[1],
+                "batch_size": batch_size,
+                "top_k": top_k,
+                "oversampling": oversampling,
+                "chunks": len(corpus),
+                "ingest_s": round(ingest_seconds, 3),
+                "ingest_chunks_per_s": round(len(corpus) / ingest_seconds, 1),
+                "float_index_mb": round(embed_data.embeddings.nbytes / 2**20, 3),
+                "binary_index_mb": round(embed_data.binary_embeddings.nbytes / 2**20, 3),
+                **evaluate(embed_data, queries, top_k, oversampling),
+            }
+            rows.append(row)
+            print(f"dim={row['vector_dim']:<5} batch={batch_size:<5} k={top_k:<3} x{oversampling:<3} "
+                  f"ingest={row['ingest_chunks_per_s']:>9.1f}/s "
+                  f"float p50={row['float_p50_ms']:.3f}ms binary p50={row['binary_p50_ms']:.3f}ms "
+                  f"rescored p50={row['rescored_p50_ms']:.3f}ms "
+                  f"recall binary={row['binary_recall']:.3f} rescored={row['rescored_recall']:.3f}")
+        embed_data.close()
+
+    Path(f"{args.output}.json").write_text(json.dumps(rows, indent=2))
+    with open(f"{args.output}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {args.output}.json and {args.output}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,7 @@
-from crewai import LLM
 from pydantic import BaseModel, Field
+from src.llm_client import get_llm
 
 
 def load_llm():
-    llm = LLM(
-        base_url="http://localhost:11434",
-        model="gpt-oss:20"
-    )
-    return llm
+    # Shared client: one connection pool, concurrency limit and response cache
+    return get_llm()
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,20 +9,47 @@ class Settings(BaseSettings):
 
     ollama_base_url: str = "http://localhost:11434"
     llm_model: str = "gpt-oss:20b"
+    # Requests in flight to the model server at once, shared HTTP keep-alive
+    # connections, and per-request timeout in seconds
+    llm_max_concurrency: int = 1
+    llm_pool_connections: int = 8
+    llm_timeout: float = 600
+    # Cache completions by prompt and parameters (in memory and on disk)
+    llm_cache: bool = True
+    llm_cache_size: int = 256
+    llm_cache_path: str = "./cache/llm_cache.db"
 
     embedding_model: str = "nomic-embed-text"
     vector_dim: int = 1024
+    # Storage dtype for float embeddings kept in memory ("float32" or "float16")
+    embedding_dtype: str = "float32"
 
     top_k: int = 3
     batch_size: int = 512
+    # Worker processes for document encoding (0 encodes in-process) and the
+    # number of texts each worker encodes per call
+    encode_workers: int = 0
+    encode_batch_size: int = 32
     rerank_top_k: int = 3
+    # Binary shortlist size is rerank_top_k * rerank_oversampling
+    rerank_oversampling: int = 4
+    # Most recent query embeddings kept in memory (0 disables the cache)
+    query_cache_size: int = 1024
 
     milvus_db_path: str = "./data/milvus_binary.db"
+    embedding_store_path: str = "./data/embedding_store"
     collection_name: str = "paralegal_agent"
 
     docs_path: str = "./data/raft.pdf"
+    # Characters per chunk, characters shared with the previous chunk, and
+    # batches buffered between ingestion stages
+    chunk_size: int = Field(1000, gt=0)
+    chunk_overlap: int = Field(100, ge=0)
+    ingest_queue_size: int = 4
 
     hf_cache_dir: str = "./cache/hf_cache"
+    # Reuse stored vectors for unchanged chunks (SQLite file under hf_cache_dir)
+    embedding_cache: bool = True
 
     temperature: float = 0.6
     max_tokens: int = 1000
@@ -31,6 +59,12 @@ class Settings(BaseSettings):
         case_sensitive=False,
     )
 
+    @model_validator(mode="after")
+    def check_chunk_overlap(self) -> "Settings":
+        if self.chunk_overlap >= self.chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        return self
+
 
 def model_post_init(self, __context) -> None:
     Path(self.milvus_db_path).parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,168 @@
+import numpy as np
+from typing import Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Popcount of every byte value, used when np.bitwise_count (NumPy >= 2.0) is missing.
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_HAS_BITWISE_COUNT = hasattr(np, "bitwise_count")
+
+
+def binary_quantize(embeddings: np.ndarray) -> np.ndarray:
+    """Sign-quantize float embeddings and pack them to uint8 codes (8 dims per byte)."""
+    embeddings = np.atleast_2d(np.asarray(embeddings))
+    return np.packbits(embeddings > 0, axis=1)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    if _HAS_BITWISE_COUNT:
+        return np.bitwise_count(words)
+    return _POPCOUNT_TABLE[words.view(np.uint8)]
+
+
+def hamming_distances(queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances between packed query codes and packed codes.
+
+    Both inputs are 2-D arrays of the same word dtype (uint8 or uint64) and
+    width; the result has shape ``(len(queries), len(codes))``.
+    """
+    xor = np.bitwise_xor(queries[:, None, :], codes[None, :, :])
+    return _popcount(xor).sum(axis=2, dtype=np.uint32)
+
+
+class BinaryIndex:
+    """In-memory Hamming-distance index over packed binary codes.
+
+    Codes are kept in one contiguous ``uint8`` matrix that grows by doubling,
+    with each row zero-padded to a multiple of 8 bytes so distances can be
+    computed on ``uint64`` words (padding bits are zero on both sides and
+    never contribute to the distance). Searches scan the matrix in chunks so
+    the temporary XOR buffer stays under ``max_chunk_bytes`` however many
+    codes are stored.
+    """
+
+    def __init__(
+        self,
+        code_bytes: int = None,
+        capacity: int = 1024,
+        max_chunk_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.code_bytes = code_bytes
+        self.max_chunk_bytes = max_chunk_bytes
+        self._capacity = capacity
+        self._codes = None
+        self._size = 0
+        if code_bytes is not None:
+            self._allocate(code_bytes)
+
+    def _allocate(self, code_bytes: int):
+        self.code_bytes = code_bytes
+        self._row_bytes = -(-code_bytes // 8) * 8
+        self._codes = np.zeros((self._capacity, self._row_bytes), dtype=np.uint8)
+
+    def _reserve(self, rows: int):
+        if rows <= len(self._codes):
+            return
+        capacity = max(rows, 2 * len(self._codes))
+        codes = np.zeros((capacity, self._row_bytes), dtype=np.uint8)
+        codes[: self._size] = self._codes[: self._size]
+        self._codes = codes
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, code_bytes: int, **kwargs) -> "BinaryIndex":
+        """Search already padded codes in place, e.g. a read-only memory map.
+
+        codes must be (n, row_bytes) uint8 with row_bytes the multiple of 8
+        at or above code_bytes. Nothing is copied until the next add().
+        """
+        index = cls(**kwargs)
+        index.code_bytes = code_bytes
+        index._row_bytes = -(-code_bytes // 8) * 8
+        if codes.shape[1] != index._row_bytes:
+            raise ValueError(f"Expected padded rows of {index._row_bytes} bytes")
+        index._codes = codes
+        index._size = len(codes)
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Stored codes without padding, as a view (shape ``(len(self), code_bytes)``)."""
+        if self._codes is None:
+            return np.empty((0, self.code_bytes or 0), dtype=np.uint8)
+        return self._codes[: self._size, : self.code_bytes]
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self._codes is None else self._codes.nbytes
+
+    def add(self, codes: np.ndarray) -> np.ndarray:
+        """Append packed codes and return the ids assigned to them."""
+        codes = np.atleast_2d(np.asarray(codes, dtype=np.uint8))
+        if self._codes is None:
+            self._allocate(codes.shape[1])
+        if codes.shape[1] != self.code_bytes:
+            raise ValueError(
+                f"Expected codes of {self.code_bytes} bytes, got {codes.shape[1]}")
+
+        start = self._size
+        self._reserve(start + len(codes))
+        self._codes[start: start + len(codes), : self.code_bytes] = codes
+        self._size += len(codes)
+        return np.arange(start, self._size)
+
+    def add_embeddings(self, embeddings: np.ndarray) -> np.ndarray:
+        """Quantize float embeddings and append them."""
+        return self.add(binary_quantize(embeddings))
+
+    def _words(self, codes: np.ndarray) -> np.ndarray:
+        if _HAS_BITWISE_COUNT:
+            return codes.view(np.uint64)
+        return codes
+
+    def _pad(self, codes: np.ndarray) -> np.ndarray:
+        padded = np.zeros((len(codes), self._row_bytes), dtype=np.uint8)
+        padded[:, : self.code_bytes] = codes
+        return padded
+
+    def search(self, queries: np.ndarray, top_k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ``top_k`` nearest ids and their Hamming distances per query.
+
+        ``queries`` is one packed code or a 2-D batch of them. Both results
+        have shape ``(n_queries, k)`` with ``k = min(top_k, len(self))``,
+        ordered by increasing distance (ties broken by lower id).
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.uint8))
+        k = min(top_k, self._size)
+        if k <= 0:
+            return (np.empty((len(queries), 0), dtype=np.int64),
+                    np.empty((len(queries), 0), dtype=np.uint32))
+        if queries.shape[1] != self.code_bytes:
+            raise ValueError(
+                f"Expected queries of {self.code_bytes} bytes, got {queries.shape[1]}")
+
+        query_words = self._words(self._pad(queries))
+        chunk_rows = max(k, self.max_chunk_bytes // max(1, len(queries) * self._row_bytes))
+
+        # Distances and ids are packed into one int64 sort key (distance in the
+        # high bits), so partitioning orders by distance and breaks ties by id.
+        candidates = []
+        for start in range(0, self._size, chunk_rows):
+            stop = min(start + chunk_rows, self._size)
+            dists = hamming_distances(query_words, self._words(self._codes[start:stop]))
+            keys = (dists.astype(np.int64) << 32) | np.arange(start, stop, dtype=np.int64)
+            if stop - start > k:
+                keys = np.partition(keys, k - 1, axis=1)[:, :k]
+            candidates.append(keys)
+
+        keys = np.concatenate(candidates, axis=1)
+        if keys.shape[1] > k:
+            keys = np.partition(keys, k - 1, axis=1)[:, :k]
+        keys.sort(axis=1)
+        return keys & 0xFFFFFFFF, (keys >> 32).astype(np.uint32)
+
+    def clear(self):
+        self._size = 0
@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class GrowableArray:
+    """Row-appendable 2-D NumPy buffer that grows by doubling.
+
+    Appending copies each batch once into preallocated storage instead of
+    building Python lists, and array is a zero-copy view of the filled rows.
+    The row width is taken from the first batch unless given up front.
+    """
+
+    def __init__(self, dim: int = None, dtype=np.float32, capacity: int = 1024):
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._capacity = capacity
+        self._data = None
+        self._size = 0
+        if dim is not None:
+            self._data = np.empty((capacity, dim), dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def array(self) -> np.ndarray:
+        if self._data is None:
+            return np.empty((0, self.dim or 0), dtype=self.dtype)
+        return self._data[: self._size]
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self._data is None else self._data.nbytes
+
+    def reserve(self, rows: int):
+        """Make room for at least rows rows in total."""
+        if self._data is None:
+            self._data = np.empty((max(rows, self._capacity), self.dim), dtype=self.dtype)
+        elif rows > len(self._data):
+            data = np.empty((max(rows, 2 * len(self._data)), self.dim), dtype=self.dtype)
+            data[: self._size] = self._data[: self._size]
+            self._data = data
+
+    def append(self, rows: np.ndarray) -> np.ndarray:
+        """Copy rows in (casting to dtype) and return a view of where they landed."""
+        rows = np.atleast_2d(rows)
+        if self.dim is None:
+            self.dim = rows.shape[1]
+        if rows.shape[1] != self.dim:
+            raise ValueError(f"Expected rows of width {self.dim}, got {rows.shape[1]}")
+
+        start = self._size
+        self.reserve(start + len(rows))
+        self._data[start: start + len(rows)] = rows
+        self._size += len(rows)
+        return self._data[start: self._size]
+
+    def clear(self):
+        self._size = 0
@@ -1,8 +1,16 @@
 import numpy as np
-from typing import List
+from typing import List, Tuple
 import logging
+from pathlib import Path
 from sentence_transformers import SentenceTransformer
 from settings import settings
+from src.binary_index import BinaryIndex, binary_quantize
+from src.buffers import GrowableArray
+from src.embedding_cache import EmbeddingCache
+from src.embedding_store import EmbeddingStore
+from src.encode_pool import EncodePool
+from src.query_cache import QueryCache
+from src.retriever import Retriever
 
 logger = logging.getLogger(__name__)
 
@@ -18,16 +26,61 @@ class EmbedData:
         self,
         embed_model_name: str = None,
         batch_size: int = None,
-        cache_folder: str = None
+        cache_folder: str = None,
+        embedding_dtype: str = None,
+        store: EmbeddingStore = None,
+        cache: EmbeddingCache = None,
+        encode_workers: int = None,
     ):
         self.embed_model_name = embed_model_name or settings.embedding_model
         self.batch_size = batch_size or settings.batch_size
         self.cache_folder = cache_folder or settings.hf_cache_dir
+        self.embedding_dtype = np.dtype(embedding_dtype or settings.embedding_dtype)
 
         self.embed_model = self._load_embed_model()
-        self.embeddings = []
-        self.binary_embeddings = []
-        self.contexts = []
+        if cache is None and settings.embedding_cache:
+            cache = EmbeddingCache(self.embed_model_name, Path(
+                self.cache_folder) / "embedding_cache.sqlite")
+        self.cache = cache
+        self.query_cache = QueryCache(settings.query_cache_size)
+
+        if encode_workers is None:
+            encode_workers = settings.encode_workers
+        self.encode_pool = None
+        if encode_workers > 0:
+            self.encode_pool = EncodePool(
+                self.embed_model_name, encode_workers, cache_folder=self.cache_folder)
+        # Float and packed binary vectors live in contiguous NumPy buffers;
+        # row i of each belongs to self.contexts[i]. With a store, they live
+        # in its memory-mapped files instead and survive restarts.
+        self.store = store
+        self._embeddings = GrowableArray(dtype=self.embedding_dtype)
+        self._contexts = []
+        self.binary_index = BinaryIndex()
+        if store is not None and len(store):
+            self._remap_store()
+            logger.info(f"Opened {len(store)} stored embeddings from {store.path}")
+
+    def _remap_store(self):
+        self.binary_index = BinaryIndex.from_codes(self.store.binary_codes, self.store.code_bytes)
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Float embeddings as an (n, dim) view; no copy is made."""
+        if self.store is not None:
+            return self.store.embeddings
+        return self._embeddings.array
+
+    @property
+    def contexts(self):
+        if self.store is not None:
+            return self.store.contexts
+        return self._contexts
+
+    @property
+    def binary_embeddings(self) -> np.ndarray:
+        """Packed binary codes as an (n, dim / 8) uint8 view."""
+        return self.binary_index.codes
 
     def _load_embed_model(self):
         """Load the embedding model using sentence-transformers"""
@@ -39,61 +92,139 @@ class EmbedData:
         )
         return model
 
-    def _binary_quantize(self, embeddings: List[List[float]]):
-        """Convert float32 embeddings to binary vectors."""
-        embeddings_array = np.array(embeddings)
-        binary_embeddings = np.where(
-            embeddings_array > 0, 1, 0).astype(np.uint8)
-
+    def _binary_quantize(self, embeddings: np.ndarray) -> np.ndarray:
+        """Convert float embeddings to binary vectors and add them to the index."""
         # Pack bits into bytes (8 dimensions per byte)
-        packed_embeddings = np.packbits(binary_embeddings, axis=1)
-        return [vec.tobytes() for vec in packed_embeddings]
-
-    def generate_embedding(self, contexts: List[str]):
-        embeddings = self.embed_model.encode(
+        packed_embeddings = binary_quantize(embeddings)
+        self.binary_index.add(packed_embeddings)
+        return packed_embeddings
+
+    def generate_embedding(self, contexts: List[str]) -> np.ndarray:
+        """Embed contexts, reusing cached vectors for chunks seen before."""
+        if self.cache is not None:
+            return self.cache.encode(contexts, self._encode)
+        return self._encode(contexts)
+
+    def _encode(self, contexts: List[str]) -> np.ndarray:
+        if self.encode_pool is not None:
+            return self.encode_pool.encode(contexts)
+        return self.embed_model.encode(
             sentences=contexts,
             batch_size=min(self.batch_size, max(1, len(contexts))),
             convert_to_numpy=True,
             normalize_embeddings=False,
             show_progress_bar=False,
         )
-        return embeddings.tolist()
+
+    def add(self, contexts: List[str], embeddings: np.ndarray, codes: np.ndarray = None):
+        """Append contexts with vectors that were already computed.
+
+        codes are the packed binary vectors; they are derived from
+        embeddings when not given.
+        """
+        if self.store is not None:
+            if codes is None:
+                codes = binary_quantize(embeddings)
+            self.store.append(embeddings, codes, contexts)
+            self._remap_store()
+            return
+
+        # Copy float32 embeddings into the buffer, then quantize that slice
+        embeddings = self._embeddings.append(embeddings)
+        if codes is None:
+            self._binary_quantize(embeddings)
+        else:
+            self.binary_index.add(codes)
+        self._contexts.extend(contexts)
 
     def embed(self, contexts: List[str]):
-        self.contexts = contexts
+        """Embed contexts and append them, with their vectors, to what is stored."""
         logger.info(f"Generating embeddings for {len(contexts)} contexts...")
 
         for batch_context in batch_iterate(contexts, self.batch_size):
-            # Generate float32 embeddings
-            batch_embeddings = self.generate_embedding(batch_context)
-            self.embeddings.extend(batch_embeddings)
-
-            # Convert to binary and store
-            binary_batch = self._binary_quantize(batch_embeddings)
-            self.binary_embeddings.extend(binary_batch)
+            self.add(batch_context, self.generate_embedding(batch_context))
 
         logger.info(
             f"Generated {len(self.embeddings)} embeddings with binary quantization")
+        if self.cache is not None:
+            logger.info(f"Embedding cache: {self.cache.stats()}")
+
+    def embed_queries(self, queries: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Float embeddings and packed binary codes for many queries at once.
+
+        Repeated queries are served from an LRU cache; all the rest are
+        encoded together in a single model call. Row i of both results
+        belongs to queries[i].
+        """
+        keys = [self.query_cache.key(query) for query in queries]
+        cached = {key: self.query_cache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, entry in cached.items() if entry is None]
+
+        if missing:
+            embeddings = self.embed_model.encode(
+                sentences=missing,
+                batch_size=min(self.batch_size, len(missing)),
+                convert_to_numpy=True,
+                normalize_embeddings=False,
+                show_progress_bar=False,
+            ).astype(np.float32, copy=False)
+            codes = binary_quantize(embeddings)
+            for key, embedding, code in zip(missing, embeddings, codes):
+                self.query_cache.put(key, embedding, code)
+                cached[key] = (embedding, code)
+
+        if not queries:
+            return np.empty((0, 0), dtype=np.float32), np.empty((0, 0), dtype=np.uint8)
+        return (np.stack([cached[key][0] for key in keys]),
+                np.stack([cached[key][1] for key in keys]))
 
     def get_query_embedding(self, query: str):
         # Generate embedding for a single query
-        embedding = self.embed_model.encode(
-            sentences=[query],
-            convert_to_numpy=True,
-            normalize_embeddings=False,
-            show_progress_bar=False,
-        )
-        return embedding[0].tolist()
+        return self.embed_queries([query])[0][0]
 
-    def binary_quantize_query(self, query_embedding: List[float]):
+    def binary_quantize_query(self, query_embedding: np.ndarray) -> bytes:
         # Convert query embedding to binary format
-        embedding_array = np.array([query_embedding])
-        binary_embedding = np.where(embedding_array > 0, 1, 0).astype(np.uint8)
-        packed_embedding = np.packbits(binary_embedding, axis=1)
-        return packed_embedding[0].tobytes()
+        return binary_quantize(query_embedding)[0].tobytes()
+
+    def milvus_rows(self, start: int = 0) -> List[dict]:
+        """Rows from start onwards in the shape Milvus inserts expect.
+
+        This is the only place vectors become Python objects.
+        """
+        return [
+            {"context": context, "binary_vector": code.tobytes()}
+            for context, code in zip(self.contexts[start:], self.binary_embeddings[start:])
+        ]
+
+    def search(self, query: str, top_k: int = None):
+        """Find the contexts closest to query by Hamming distance, without Milvus."""
+        query_embedding = self.get_query_embedding(query)
+        ids, distances = self.binary_index.search(
+            binary_quantize(query_embedding), top_k or settings.top_k)
+        return [
+            {"id": int(i), "context": self.contexts[i], "distance": int(d)}
+            for i, d in zip(ids[0], distances[0])
+        ]
+
+    def retrieve(self, query: str, top_k: int = None, oversampling: int = None):
+        """Binary shortlist then float rescoring of the closest contexts."""
+        retriever = Retriever(self.binary_index, self.embeddings, oversampling)
+        ids, scores = retriever.search(self.get_query_embedding(query), top_k)
+        return [
+            {"id": int(i), "context": self.contexts[i], "score": float(s)}
+            for i, s in zip(ids[0], scores[0])
+        ]
 
     def clear(self):
-        self.embeddings.clear()
-        self.binary_embeddings.clear()
-        self.contexts.clear()
+        """Drop all embeddings and contexts, including those in the store."""
+        self._embeddings.clear()
+        self.binary_index = BinaryIndex()
+        self._contexts.clear()
+        if self.store is not None:
+            self.store.clear()
         logger.info("Cleared all embeddings and contexts")
+
+    def close(self):
+        """Stop the encode workers, if any."""
+        if self.encode_pool is not None:
+            self.encode_pool.close()
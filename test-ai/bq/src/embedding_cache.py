@@ -0,0 +1,119 @@
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from pathlib import Path
+from typing import Callable, List
+import logging
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement.
+_LOOKUP_CHUNK = 500
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace, so trivial edits still hit."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent (model, chunk hash) -> vector cache backed by SQLite.
+
+    Only texts that miss are passed to the encoder, so re-indexing a
+    document costs time proportional to the chunks that actually changed.
+    Vectors are stored as float32 blobs; the model name is part of the key,
+    so switching models never returns stale vectors. Safe to share between
+    threads.
+    """
+
+    def __init__(self, model: str, path: str = None):
+        self.model = model
+        self.path = Path(path or Path(settings.hf_cache_dir) / "embedding_cache.sqlite")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, hashes: List[str]) -> dict:
+        """Stored vectors for whichever of hashes are cached, keyed by hash."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), _LOOKUP_CHUNK):
+                chunk = hashes[start: start + _LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    "SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN "
+                    f"({','.join('?' * len(chunk))})",
+                    (self.model, *chunk),
+                ).fetchall()
+                found.update((h, np.frombuffer(blob, dtype=np.float32)) for h, blob in rows)
+        return found
+
+    def put_many(self, hashes: List[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                [(self.model, h, v.tobytes()) for h, v in zip(hashes, vectors)],
+            )
+            self._db.execute("COMMIT")
+
+    def encode(self, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Embeddings for texts, in order, calling encode only on uncached texts.
+
+        Duplicate texts within one call are encoded once.
+        """
+        hashes = [text_hash(text) for text in texts]
+        found = self.get_many(list(dict.fromkeys(hashes)))
+
+        missing = {}
+        for text, h in zip(texts, hashes):
+            if h not in found and h not in missing:
+                missing[h] = text
+        misses = sum(h not in found for h in hashes)
+        with self._lock:
+            self.hits += len(hashes) - misses
+            self.misses += misses
+
+        if missing:
+            vectors = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            self.put_many(list(missing), vectors)
+            found.update(zip(missing, vectors))
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([found[h] for h in hashes])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model,)
+            ).fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
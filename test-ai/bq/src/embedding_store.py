@@ -0,0 +1,194 @@
+import json
+import os
+import numpy as np
+from pathlib import Path
+from typing import List, Sequence
+import logging
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StoredContexts(Sequence):
+    """Read-only list of context strings decoded on access from a memory map."""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return max(0, len(self._offsets) - 1)
+
+    @property
+    def nbytes(self) -> int:
+        """Total encoded size, which is also where the next context starts."""
+        return int(self._offsets[-1])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("context index out of range")
+        start, stop = self._offsets[i], self._offsets[i + 1]
+        return bytes(self._data[start:stop]).decode("utf-8")
+
+
+class EmbeddingStore:
+    """Append-only on-disk store of float vectors, packed binary codes and contexts.
+
+    Each kind of data is a flat file that is memory-mapped read-only, so
+    opening a store with millions of vectors only reads meta.json and pages
+    the rest in on demand:
+
+        embeddings.bin  float rows (float32 or float16), count x dim
+        binary.bin      packed codes, each row zero-padded to a multiple of
+                        8 bytes so BinaryIndex can search the map in place
+        contexts.bin    UTF-8 context strings back to back
+        offsets.bin     uint64 start offset of each context, plus the end
+
+    meta.json is rewritten (atomically) after each append and its count is
+    authoritative: bytes beyond it, left by an interrupted append, are
+    truncated on open.
+    """
+
+    def __init__(self, path: str = None, dtype: str = None, model: str = None):
+        self.path = Path(path or settings.embedding_store_path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        meta_file = self.path / "meta.json"
+        if meta_file.is_file():
+            self.meta = json.loads(meta_file.read_text())
+        else:
+            self.meta = {
+                "count": 0,
+                "dim": None,
+                "code_bytes": None,
+                "dtype": str(np.dtype(dtype or settings.embedding_dtype)),
+                "model": model,
+            }
+        if model and self.meta.get("model") not in (None, model):
+            raise ValueError(
+                f"Store at {self.path} holds embeddings from {self.meta['model']}, not {model}")
+
+        self._discard_partial_append()
+        self._map()
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(self.meta["dtype"])
+
+    @property
+    def _row_bytes(self) -> int:
+        return -(-self.meta["code_bytes"] // 8) * 8
+
+    def _file(self, name: str) -> Path:
+        return self.path / name
+
+    def _expected_sizes(self) -> dict:
+        count = self.meta["count"]
+        if not count:
+            return {name: 0 for name in ("embeddings.bin", "binary.bin", "contexts.bin", "offsets.bin")}
+        offsets = np.memmap(self._file("offsets.bin"), dtype=np.uint64, mode="r")
+        return {
+            "embeddings.bin": count * self.meta["dim"] * self.dtype.itemsize,
+            "binary.bin": count * self._row_bytes,
+            "contexts.bin": int(offsets[count]),
+            "offsets.bin": (count + 1) * 8,
+        }
+
+    def _discard_partial_append(self):
+        for name, size in self._expected_sizes().items():
+            file = self._file(name)
+            if file.exists() and file.stat().st_size > size:
+                logger.warning(f"Truncating {file} to {size} bytes after an interrupted append")
+                os.truncate(file, size)
+
+    def _map(self):
+        count = self.meta["count"]
+        if not count:
+            dim, code_bytes = self.meta["dim"] or 0, self.meta["code_bytes"] or 0
+            self._embeddings = np.empty((0, dim), dtype=self.dtype)
+            self._binary = np.empty((0, -(-code_bytes // 8) * 8), dtype=np.uint8)
+            self._contexts = StoredContexts(np.empty(0, dtype=np.uint8), np.zeros(1, dtype=np.uint64))
+            return
+
+        self._embeddings = np.memmap(
+            self._file("embeddings.bin"), dtype=self.dtype, mode="r", shape=(count, self.meta["dim"]))
+        self._binary = np.memmap(
+            self._file("binary.bin"), dtype=np.uint8, mode="r", shape=(count, self._row_bytes))
+        offsets = np.memmap(self._file("offsets.bin"), dtype=np.uint64, mode="r", shape=(count + 1,))
+        data = (np.memmap(self._file("contexts.bin"), dtype=np.uint8, mode="r")
+                if offsets[count] else np.empty(0, dtype=np.uint8))
+        self._contexts = StoredContexts(data, offsets)
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        return self._embeddings
+
+    @property
+    def binary_codes(self) -> np.ndarray:
+        """Packed codes including row padding, as BinaryIndex.from_codes expects."""
+        return self._binary
+
+    @property
+    def code_bytes(self) -> int:
+        return self.meta["code_bytes"]
+
+    @property
+    def contexts(self) -> StoredContexts:
+        return self._contexts
+
+    def append(self, embeddings: np.ndarray, codes: np.ndarray, contexts: List[str]):
+        """Append a batch; the three arguments must have one row per context."""
+        embeddings = np.atleast_2d(embeddings)
+        codes = np.atleast_2d(np.asarray(codes, dtype=np.uint8))
+        if not len(embeddings) == len(codes) == len(contexts):
+            raise ValueError("embeddings, codes and contexts must have the same length")
+        if not len(contexts):
+            return
+
+        if self.meta["dim"] is None:
+            self.meta["dim"], self.meta["code_bytes"] = embeddings.shape[1], codes.shape[1]
+        if embeddings.shape[1] != self.meta["dim"] or codes.shape[1] != self.meta["code_bytes"]:
+            raise ValueError(
+                f"Store holds {self.meta['dim']}-dim vectors and {self.meta['code_bytes']}-byte codes")
+
+        padded = np.zeros((len(codes), self._row_bytes), dtype=np.uint8)
+        padded[:, : codes.shape[1]] = codes
+        encoded = [context.encode("utf-8") for context in contexts]
+
+        count = self.meta["count"]
+        offsets = self._contexts.nbytes + np.cumsum([len(b) for b in encoded], dtype=np.uint64)
+        if not count:
+            offsets = np.concatenate([np.zeros(1, dtype=np.uint64), offsets])
+
+        with open(self._file("embeddings.bin"), "ab") as f:
+            f.write(np.ascontiguousarray(embeddings, dtype=self.dtype).tobytes())
+        with open(self._file("binary.bin"), "ab") as f:
+            f.write(padded.tobytes())
+        with open(self._file("contexts.bin"), "ab") as f:
+            f.write(b"".join(encoded))
+        with open(self._file("offsets.bin"), "ab") as f:
+            f.write(offsets.astype(np.uint64).tobytes())
+
+        self.meta["count"] = count + len(contexts)
+        self._write_meta()
+        self._map()
+
+    def _write_meta(self):
+        tmp = self._file("meta.json.tmp")
+        tmp.write_text(json.dumps(self.meta))
+        os.replace(tmp, self._file("meta.json"))
+
+    def clear(self):
+        """Delete every stored vector and context."""
+        self.meta.update(count=0, dim=None, code_bytes=None)
+        self._write_meta()
+        self._map()
+        for name in ("embeddings.bin", "binary.bin", "contexts.bin", "offsets.bin"):
+            self._file(name).unlink(missing_ok=True)
@@ -0,0 +1,119 @@
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+import logging
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker process by _init_worker.
+_worker_model = None
+
+
+def _init_worker(model_name: str, cache_folder: str, threads: int):
+    global _worker_model
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    _worker_model = SentenceTransformer(
+        model_name_or_path=model_name,
+        cache_folder=cache_folder,
+        trust_remote_code=True,
+    )
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(
+        sentences=texts,
+        batch_size=len(texts),
+        convert_to_numpy=True,
+        normalize_embeddings=False,
+        show_progress_bar=False,
+    )
+
+
+def _ready() -> bool:
+    return _worker_model is not None
+
+
+def length_sorted_batches(texts: List[str], batch_size: int) -> List[np.ndarray]:
+    """Split text indices into batches of similar length to reduce padding."""
+    order = np.argsort([len(text) for text in texts], kind="stable")
+    return [order[i: i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+class EncodePool:
+    """Pool of worker processes, each holding its own SentenceTransformer.
+
+    Workers are spawned (not forked, so no torch state is inherited) and load
+    the model once, when the pool starts. encode() sorts texts by length,
+    hands out batches of batch_size, and writes each result back at its
+    original position, so callers see the same order they passed in. The CPU
+    is shared out evenly: each worker gets cpu_count // workers torch
+    threads.
+    """
+
+    def __init__(
+        self,
+        model_name: str = None,
+        workers: int = None,
+        batch_size: int = None,
+        cache_folder: str = None,
+    ):
+        self.model_name = model_name or settings.embedding_model
+        self.workers = workers or settings.encode_workers or multiprocessing.cpu_count()
+        self.batch_size = batch_size or settings.encode_batch_size
+        self.cache_folder = cache_folder or settings.hf_cache_dir
+        self._executor = None
+
+    def start(self):
+        """Spawn the workers and wait until each has loaded the model."""
+        if self._executor is not None:
+            return
+        threads = max(1, multiprocessing.cpu_count() // self.workers)
+        logger.info(
+            f"Starting {self.workers} encode workers ({threads} threads each) for {self.model_name}")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.cache_folder, threads),
+        )
+        # Give every worker something to do so the models load now rather
+        # than on the first real batch.
+        for future in [self._executor.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        self.start()
+        batches = length_sorted_batches(texts, self.batch_size)
+        futures = [
+            self._executor.submit(_encode_batch, [texts[i] for i in batch])
+            for batch in batches
+        ]
+
+        out = None
+        for batch, future in zip(batches, futures):
+            vectors = future.result()
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=vectors.dtype)
+            out[batch] = vectors
+        return out if out is not None else np.empty((0, 0), dtype=np.float32)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
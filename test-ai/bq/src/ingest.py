@@ -0,0 +1,254 @@
+import argparse
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List
+import logging
+from settings import settings
+from src.binary_index import binary_quantize
+from src.embed_data import EmbedData
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output on its queue.
+_DONE = object()
+
+
+def read_pages(path: str) -> Iterator[str]:
+    """Yield the text of each page of a PDF, one page in memory at a time."""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            # pdfplumber caches parsed layout objects on the page otherwise.
+            page.flush_cache()
+
+
+def chunk_text(pages: Iterable[str], chunk_size: int = None, overlap: int = None) -> Iterator[str]:
+    """Split a stream of page texts into chunks of about chunk_size characters.
+
+    Chunks may span pages, break at whitespace where possible and repeat the
+    last overlap characters of the previous chunk.
+    """
+    chunk_size = chunk_size or settings.chunk_size
+    overlap = settings.chunk_overlap if overlap is None else overlap
+    if not 0 <= overlap < chunk_size:
+        # Each cut must move the buffer forward, or the loop below never ends.
+        raise ValueError(f"overlap must be in [0, chunk_size), got {overlap} for chunk_size {chunk_size}")
+    buffer = ""
+    for page in pages:
+        buffer = f"{buffer} {page}" if buffer else page
+        while len(buffer) >= chunk_size:
+            cut = buffer.rfind(" ", overlap + 1, chunk_size)
+            if cut <= overlap:
+                cut = chunk_size
+            chunk = buffer[:cut].strip()
+            if chunk:
+                yield chunk
+            buffer = buffer[max(0, cut - overlap):]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@dataclass
+class StageStats:
+    name: str
+    batches: int = 0
+    items: int = 0
+    busy_seconds: float = 0.0
+    # Time spent blocked on a full output queue, i.e. waiting on the next stage.
+    blocked_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "batches": self.batches,
+            "items": self.items,
+            "busy_s": round(self.busy_seconds, 3),
+            "blocked_s": round(self.blocked_seconds, 3),
+            "items_per_s": round(self.items / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+        }
+
+
+@dataclass
+class IngestReport:
+    stages: List[StageStats] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+    chunks: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "elapsed_s": round(self.elapsed_seconds, 3),
+            "chunks_per_s": round(self.chunks / self.elapsed_seconds, 1) if self.elapsed_seconds else 0.0,
+            "stages": [stage.as_dict() for stage in self.stages],
+        }
+
+
+class IngestPipeline:
+    """Streams documents through parse -> embed -> index with overlapping stages.
+
+    Parsing/chunking and encoding each run on their own thread, and the
+    calling thread writes finished batches into the EmbedData index (or its
+    store). Stages are joined by queues of at most queue_size batches, so a
+    slow stage applies backpressure to the ones before it and memory use
+    does not grow with corpus size. An error in any stage stops the others
+    and is re-raised from run().
+    """
+
+    def __init__(
+        self,
+        embed_data: EmbedData,
+        batch_size: int = None,
+        queue_size: int = None,
+        log_every: int = 10,
+    ):
+        self.embed_data = embed_data
+        self.batch_size = batch_size or settings.batch_size
+        self.queue_size = queue_size or settings.ingest_queue_size
+        self.log_every = log_every
+        self._stop = threading.Event()
+        self._error = None
+
+    def _put(self, q: queue.Queue, item, stats: StageStats) -> bool:
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                stats.blocked_seconds += time.perf_counter() - started
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_stage(self, target, *args):
+        try:
+            target(*args)
+        except BaseException as exc:
+            self._error = exc
+            self._stop.set()
+
+    def _parse(self, paths: List[str], out: queue.Queue, stats: StageStats):
+        chunks = chunk_text(page for path in paths for page in read_pages(path))
+        batches = batched(chunks, self.batch_size)
+        while True:
+            started = time.perf_counter()
+            batch = next(batches, None)
+            stats.busy_seconds += time.perf_counter() - started
+            if batch is None:
+                break
+            stats.batches += 1
+            stats.items += len(batch)
+            if not self._put(out, batch, stats):
+                return
+        self._put(out, _DONE, stats)
+
+    def _encode(self, inp: queue.Queue, out: queue.Queue, stats: StageStats):
+        while True:
+            batch = self._get(inp)
+            if batch is _DONE:
+                break
+            started = time.perf_counter()
+            embeddings = self.embed_data.generate_embedding(batch)
+            codes = binary_quantize(embeddings)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.batches += 1
+            stats.items += len(batch)
+            if not self._put(out, (batch, embeddings, codes), stats):
+                return
+        self._put(out, _DONE, stats)
+
+    def run(self, paths: List[str] = None) -> IngestReport:
+        paths = paths or [settings.docs_path]
+        self._stop.clear()
+        self._error = None
+        parse_stats, encode_stats, write_stats = (
+            StageStats("parse"), StageStats("encode"), StageStats("write"))
+        chunks_q = queue.Queue(maxsize=self.queue_size)
+        vectors_q = queue.Queue(maxsize=self.queue_size)
+
+        threads = [
+            threading.Thread(target=self._run_stage, name="ingest-parse",
+                             args=(self._parse, paths, chunks_q, parse_stats), daemon=True),
+            threading.Thread(target=self._run_stage, name="ingest-encode",
+                             args=(self._encode, chunks_q, vectors_q, encode_stats), daemon=True),
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(vectors_q)
+                if item is _DONE:
+                    break
+                batch, embeddings, codes = item
+                write_started = time.perf_counter()
+                self.embed_data.add(batch, embeddings, codes)
+                write_stats.busy_seconds += time.perf_counter() - write_started
+                write_stats.batches += 1
+                write_stats.items += len(batch)
+                if write_stats.batches % self.log_every == 0:
+                    elapsed = time.perf_counter() - started
+                    logger.info(
+                        f"Ingested {write_stats.items} chunks in {elapsed:.1f}s "
+                        f"({write_stats.items / elapsed:.1f} chunks/s)")
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+        report = IngestReport(
+            stages=[parse_stats, encode_stats, write_stats],
+            elapsed_seconds=time.perf_counter() - started,
+            chunks=write_stats.items,
+        )
+        for stage in report.stages:
+            logger.info(f"Stage {stage.as_dict()}")
+        return report
+
+
+def main():
+    from src.embedding_store import EmbeddingStore
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Stream PDFs into the embedding store")
+    parser.add_argument("paths", nargs="*", default=[settings.docs_path])
+    parser.add_argument("--batch-size", type=int, default=settings.batch_size)
+    args = parser.parse_args()
+
+    store = EmbeddingStore(model=settings.embedding_model)
+    embed_data = EmbedData(batch_size=args.batch_size, store=store)
+    try:
+        report = IngestPipeline(embed_data, batch_size=args.batch_size).run(args.paths)
+    finally:
+        embed_data.close()
+    print(report.as_dict())
+
+
+if __name__ == "__main__":
+    main()
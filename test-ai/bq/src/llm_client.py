@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import atexit
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+import logging
+from crewai import LLM
+from litellm.llms.custom_httpx.http_handler import HTTPHandler
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+_llm = None
+_llm_lock = threading.Lock()
+
+
+class ResponseCache:
+    """Prompt + parameters -> completion text, in an LRU with an SQLite tier.
+
+    The disk tier survives restarts, so re-asking a question that was
+    already answered costs a lookup instead of a pass through the model.
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int = 256, path: str = None):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL)")
+
+    @staticmethod
+    def key(params: Dict[str, Any]) -> str:
+        blob = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return row[0]
+            if count_miss:
+                self.misses += 1
+            return None
+
+    def put(self, key: str, response: str):
+        with self._lock:
+            self._remember(key, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)", (key, response))
+
+    def _remember(self, key: str, response: str):
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+class PooledLLM(LLM):
+    """crewai LLM that caps concurrent requests and caches plain completions.
+
+    At most max_concurrency calls reach the model server at once; the rest
+    wait their turn instead of piling onto a local Ollama that would only
+    serialize them anyway. Calls without tools are looked up in the response
+    cache first, keyed on the messages and every sampling parameter, so
+    identical prompts are answered once. Tool-calling requests are never
+    cached, since their result depends on the tools' side effects.
+
+    http_client is handed to litellm with every request (its per-call
+    `client` parameter), so all calls reuse one pool of keep-alive
+    connections; close() releases it.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_concurrency: int = 1,
+        cache: ResponseCache = None,
+        http_client: HTTPHandler = None,
+        **kwargs,
+    ):
+        if http_client is not None:
+            kwargs["client"] = http_client
+        super().__init__(*args, **kwargs)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.response_cache = cache
+        self.http_client = http_client
+
+    def _cache_key(self, params: Dict[str, Any]) -> Optional[str]:
+        """Response cache key for a completion, or None if it must not be cached."""
+        if self.response_cache is None or params.get("tools"):
+            return None
+        # The HTTP client object is not part of the request.
+        return self.response_cache.key({k: v for k, v in params.items() if k != "client"})
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        *args,
+        **kwargs,
+    ):
+        key = None
+        if self.response_cache is not None and not tools:
+            key = self._cache_key(self._prepare_completion_params(messages))
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = super().call(messages, tools, *args, **kwargs)
+
+        if key is not None and isinstance(response, str):
+            self.response_cache.put(key, response)
+        return response
+
+    def _limited(self, handler, params: Dict[str, Any], *args, **kwargs):
+        # Only the request itself holds a slot: LLM.call retries some errors
+        # by calling itself again, which must not wait on its own semaphore.
+        with self._semaphore:
+            # An identical request may have finished while this one waited.
+            key = self._cache_key(params)
+            if key is not None:
+                cached = self.response_cache.get(key, count_miss=False)
+                if cached is not None:
+                    return cached
+            return handler(params, *args, **kwargs)
+
+    def _handle_non_streaming_response(self, params: Dict[str, Any], *args, **kwargs):
+        return self._limited(super()._handle_non_streaming_response, params, *args, **kwargs)
+
+    def _handle_streaming_response(self, params: Dict[str, Any], *args, **kwargs):
+        return self._limited(super()._handle_streaming_response, params, *args, **kwargs)
+
+    async def acall(self, messages: Union[str, List[Dict[str, str]]], **kwargs):
+        """call() from async code, run on a worker thread."""
+        return await asyncio.to_thread(self.call, messages, **kwargs)
+
+    def close(self):
+        if self.http_client is not None:
+            self.http_client.close()
+            self.http_client = None
+            self.additional_params.pop("client", None)
+
+
+def close_llm():
+    """Close the process-wide client's connection pool, if one was created."""
+    global _llm
+    with _llm_lock:
+        if _llm is not None:
+            _llm.close()
+            _llm = None
+
+
+def get_llm() -> PooledLLM:
+    """Process-wide LLM client, created on first use."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                cache = None
+                if settings.llm_cache:
+                    cache = ResponseCache(settings.llm_cache_size, settings.llm_cache_path)
+
+                model = settings.llm_model
+                if "/" not in model:
+                    model = f"ollama/{model}"
+                logger.info(f"Creating LLM client for {model} at {settings.ollama_base_url}")
+                _llm = PooledLLM(
+                    model=model,
+                    base_url=settings.ollama_base_url,
+                    temperature=settings.temperature,
+                    max_tokens=settings.max_tokens,
+                    timeout=settings.llm_timeout,
+                    max_concurrency=settings.llm_max_concurrency,
+                    cache=cache,
+                    # acall() runs call() on a thread, so a sync pool serves both.
+                    http_client=HTTPHandler(
+                        timeout=settings.llm_timeout,
+                        concurrent_limit=settings.llm_pool_connections,
+                    ),
+                )
+                atexit.register(close_llm)
+    return _llm
@@ -0,0 +1,58 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Tuple
+from src.embedding_cache import normalize_text
+
+
+class QueryCache:
+    """Bounded LRU of query text -> (float embedding, packed binary code).
+
+    Keys are the normalized query text, so repeats that differ only in
+    whitespace share an entry. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    key = staticmethod(normalize_text)
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, embedding: np.ndarray, code: np.ndarray):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (embedding, code)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
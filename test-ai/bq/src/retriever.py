@@ -0,0 +1,175 @@
+import argparse
+import json
+import time
+import numpy as np
+from typing import Sequence, Tuple
+from settings import settings
+from src.binary_index import BinaryIndex, binary_quantize
+
+
+def _gather(embeddings, ids: np.ndarray) -> np.ndarray:
+    """Rows of embeddings at ids (any shape), as a float32 array."""
+    if isinstance(embeddings, np.ndarray):
+        return embeddings[ids].astype(np.float32, copy=False)
+    rows = np.asarray([embeddings[i] for i in ids.ravel()], dtype=np.float32)
+    return rows.reshape(*ids.shape, -1)
+
+
+def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Column indices of the top_k highest scores per row, best first."""
+    k = min(top_k, scores.shape[1])
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+def exact_search(
+    embeddings: np.ndarray, queries: np.ndarray, top_k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exhaustive float32 dot-product search; the ground truth for recall."""
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    scores = queries @ np.asarray(embeddings, dtype=np.float32).T
+    ids = _top_k(scores, top_k)
+    return ids, np.take_along_axis(scores, ids, axis=1)
+
+
+def rescore(
+    queries: np.ndarray, candidates: np.ndarray, vectors: np.ndarray, top_k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Rank each query's candidate ids by dot product with their vectors.
+
+    vectors has shape (n_queries, n_candidates, dim), aligned with candidates.
+    """
+    scores = np.einsum("qd,qcd->qc", queries, vectors)
+    order = _top_k(scores, top_k)
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+class Retriever:
+    """Two-stage search: Hamming shortlist on binary codes, then float rescoring.
+
+    The binary index returns top_k * oversampling candidates per query, and
+    only those are rescored against the float query. With rescore="float"
+    the stored float32 embeddings are used; with rescore="bits" the query is
+    scored against the unpacked codes as +/-1 vectors, so the float
+    embeddings never need to be kept (at some cost in recall).
+    """
+
+    def __init__(
+        self,
+        index: BinaryIndex,
+        embeddings=None,
+        oversampling: int = None,
+        rescore: str = "float",
+    ):
+        if rescore not in ("float", "bits"):
+            raise ValueError("rescore must be 'float' or 'bits'")
+        if rescore == "float" and embeddings is None:
+            raise ValueError("Float rescoring needs the float embeddings")
+        self.index = index
+        self.embeddings = embeddings
+        self.oversampling = oversampling or settings.rerank_oversampling
+        self.rescore = rescore
+
+    def _candidate_vectors(self, candidates: np.ndarray, dim: int) -> np.ndarray:
+        if self.rescore == "float":
+            return _gather(self.embeddings, candidates)
+        bits = np.unpackbits(self.index.codes[candidates], axis=-1)[..., :dim]
+        return bits.astype(np.float32) * 2 - 1
+
+    def search(self, queries: np.ndarray, top_k: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ids and float scores of the top_k results per query, best first."""
+        top_k = top_k or settings.rerank_top_k
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        candidates, _ = self.index.search(binary_quantize(queries), top_k * self.oversampling)
+        if candidates.shape[1] == 0:
+            return candidates, np.empty(candidates.shape, dtype=np.float32)
+
+        vectors = self._candidate_vectors(candidates, queries.shape[1])
+        return rescore(queries, candidates, vectors, top_k)
+
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    """Mean fraction of the exact top-k ids present in each returned row."""
+    hits = [len(set(f) & set(e)) / len(e) for f, e in zip(found.tolist(), expected.tolist()) if e]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def recall_report(
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    top_k: int = None,
+    oversampling: Sequence[int] = (1, 2, 4, 8, 16),
+) -> list[dict]:
+    """Recall@k and per-query latency of each strategy against exhaustive float search."""
+    top_k = top_k or settings.rerank_top_k
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+
+    index = BinaryIndex()
+    index.add_embeddings(embeddings)
+
+    def timed(search) -> Tuple[np.ndarray, float]:
+        started = time.perf_counter()
+        ids = np.concatenate([search(query)[0] for query in queries])
+        return ids, (time.perf_counter() - started) * 1000 / len(queries)
+
+    expected, exact_ms = timed(lambda q: exact_search(embeddings, q, top_k))
+    rows = [{"strategy": "float_exact", "oversampling": None,
+             "recall": 1.0, "latency_ms": exact_ms}]
+
+    found, ms = timed(lambda q: index.search(binary_quantize(q), top_k))
+    rows.append({"strategy": "binary_only", "oversampling": None,
+                 "recall": recall_at_k(found, expected), "latency_ms": ms})
+
+    for mode in ("float", "bits"):
+        for factor in oversampling:
+            retriever = Retriever(index, embeddings, oversampling=factor, rescore=mode)
+            found, ms = timed(lambda q: retriever.search(q, top_k))
+            rows.append({"strategy": f"binary+{mode}_rescore", "oversampling": factor,
+                         "recall": recall_at_k(found, expected), "latency_ms": ms})
+    return rows
+
+
+def synthetic_embeddings(
+    count: int, dim: int, clusters: int = 256, seed: int = 0
+) -> np.ndarray:
+    """Clustered Gaussian vectors, a rough stand-in for sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim)).astype(np.float32)
+    noise = rng.standard_normal((count, dim)).astype(np.float32)
+    return centroids[rng.integers(0, clusters, count)] + 0.8 * noise
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recall@k vs. latency of binary search with float rescoring")
+    parser.add_argument("--embeddings", help=".npy file of float embeddings (default: synthetic)")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=settings.vector_dim)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=settings.rerank_top_k)
+    parser.add_argument("--oversampling", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--output", help="Write the report rows as JSON to this file")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        embeddings = np.load(args.embeddings, mmap_mode="r")
+    else:
+        embeddings = synthetic_embeddings(args.count + args.queries, args.dim)
+    queries, embeddings = embeddings[: args.queries], embeddings[args.queries:]
+
+    rows = recall_report(embeddings, queries, args.top_k, args.oversampling)
+    for row in rows:
+        print(f"{row['strategy']:<22} oversampling={str(row['oversampling']):<5} "
+              f"recall@{args.top_k}={row['recall']:.3f} latency={row['latency_ms']:.3f}ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()